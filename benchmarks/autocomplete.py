@@ -0,0 +1,51 @@
+"""
+Measures the latency of emoji autocomplete, end to end through `emoji_choices`.
+
+Run with `python -m benchmarks.autocomplete [queries]`. Most queries are
+random 1-6 character prefixes of real names, and the rest match nothing.
+Exits with an error if the 99th percentile isn't under a millisecond.
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from bot.utils.emojis import emoji_choices, emoji_index
+
+QUERIES = 5000
+BUDGET = 0.001  # Seconds the 99th percentile has to stay under.
+
+
+def queries(count: int) -> list[str]:
+    """Returns `count` queries, the same every run."""
+    rng = random.Random(0)
+    names = [entry.name.strip(":").replace("_", " ") for entry in emoji_index().entries]
+    result = [name[: rng.randint(1, 6)] for name in rng.choices(names, k=count)]
+    result[::100] = ["zzzz"] * len(result[::100])  # No matches, but a full bisect.
+    return result
+
+
+def main(count: int) -> None:
+    start = time.perf_counter()
+    emoji_index()
+    print(f"Index built in {(time.perf_counter() - start) * 1000:.0f}ms.")
+
+    timings = []
+    for query in queries(count):
+        start = time.perf_counter()
+        emoji_choices(query)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99)]
+    print(
+        f"{len(timings)} queries: median {statistics.median(timings) * 1e6:.0f}us,"
+        f" p99 {p99 * 1e6:.0f}us, max {timings[-1] * 1e6:.0f}us"
+    )
+    if p99 >= BUDGET:
+        sys.exit(f"The 99th percentile is over {BUDGET * 1000:.0f}ms.")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else QUERIES)
@@ -0,0 +1,106 @@
+"""
+Times `codepoint_from_input` against the parser it replaced, over every emoji.
+
+Run with `python -m benchmarks.emoji_parsing`. The inputs are every emoji
+known to the `emoji` package, both as characters and as space-separated
+codepoints, such as "1f1f8 1f1ea". An input is resolved correctly if it
+gives the same emoji as the emoji character itself.
+"""
+
+import re
+import time
+
+from emoji import is_emoji
+from emoji.unicode_codes import EMOJI_DATA
+
+from bot.utils.emojis import (
+    PARSE_CACHE_SIZE,
+    codepoint_from_input,
+    emoji_index,
+    get_codepoint,
+)
+
+CODE_REGEX = re.compile(r"[a-f1-9][a-f0-9]{3,5}$")
+
+
+def legacy_trim_code(codepoint: str | None) -> str | None:
+    if not codepoint:
+        return None
+    if code := CODE_REGEX.search(codepoint):
+        return code.group()
+
+
+def legacy_get_emoji(codepoint: str) -> str:
+    if code := legacy_trim_code(codepoint):
+        return chr(int(code, 16))
+    return ""
+
+
+def legacy_codepoint_from_input(raw_emoji: str) -> str:
+    """`codepoint_from_input` as it was, before the emoji index and parser."""
+    emoji_list: list[str] = [emoji.lower() for emoji in raw_emoji.split()]
+    if is_emoji(emoji_list[0]):
+        emojis = (get_codepoint(emoji) for emoji in emoji_list[0])
+        return "-".join(emojis)
+
+    emoji = "".join(
+        legacy_get_emoji(legacy_trim_code(code)) for code in emoji_list  # type: ignore
+    )
+    if is_emoji(emoji):
+        return "-".join(get_codepoint(e) for e in emoji)
+
+    raise ValueError("No codepoint could be obtained from the given input")
+
+
+def inputs() -> list[str]:
+    """Every emoji, followed by the space-separated codepoints of every emoji."""
+    emojis = list(EMOJI_DATA)
+    return emojis + [
+        " ".join(get_codepoint(char) for char in emoji) for emoji in emojis
+    ]
+
+
+def run(func, inputs: list[str], runs: int = 3) -> tuple[float, dict[str, str]]:
+    """The fastest of `runs` passes of `func` over `inputs`, in seconds per input, and its results."""
+    timings = []
+    for _ in range(runs):
+        resolved = {}
+        start = time.perf_counter()
+        for raw_emoji in inputs:
+            try:
+                resolved[raw_emoji] = func(raw_emoji)
+            except ValueError:
+                pass
+        timings.append((time.perf_counter() - start) / len(inputs))
+    return min(timings), resolved
+
+
+def main() -> None:
+    index = emoji_index()
+    raw_emojis = inputs()
+    codepoint_from_input.cache_clear()
+    parsers = {
+        "legacy": legacy_codepoint_from_input,
+        "uncached": codepoint_from_input.__wrapped__,
+    }
+
+    print(f"{len(raw_emojis)} inputs")
+    print(f"{'parser':>9} {'time':>10} {'resolved':>9} {'correct':>8}")
+    for name, parser in parsers.items():
+        per_input, resolved = run(parser, raw_emojis)
+        correct = sum(
+            (codepoint := resolved.get(raw_emoji)) is not None
+            and index.from_codepoint(codepoint) is index.get(emoji)
+            for emoji, raw_emoji in zip(list(EMOJI_DATA) * 2, raw_emojis)
+        )
+        print(f"{name:>9} {per_input * 1e6:>8.2f}us {len(resolved):>9} {correct:>8}")
+
+    # Users ask for the same emojis over and over, which fit in the cache.
+    repeated = raw_emojis[:PARSE_CACHE_SIZE]
+    run(codepoint_from_input, repeated, runs=1)
+    per_input, _ = run(codepoint_from_input, repeated)
+    print(f"Cached, over {len(repeated)} repeated inputs: {per_input * 1e6:.2f}us")
+
+
+if __name__ == "__main__":
+    main()
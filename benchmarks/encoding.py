@@ -0,0 +1,76 @@
+"""
+Measures the time and memory taken to hand large PNG and WEBP outputs to Disnake.
+
+Run with `python -m benchmarks.encoding [sizes...]`. For each size, an image
+is encoded with `encode_image` and wrapped with `file_from_bytes`, and the
+encoded file is then passed back through `convert_bytes` in the same format,
+which used to decode and encode it all over again.
+
+Memory is the peak traced by `tracemalloc` during each step. Encoding can't
+do better than the size of its output, and wrapping or passing through an
+encoded file should take next to nothing. Pillow allocates decoded pixels
+outside of Python's allocator, so they aren't counted.
+"""
+
+import asyncio
+import io
+import sys
+import time
+import tracemalloc
+
+from PIL import Image
+
+from bot.utils.images import convert_bytes, encode_image, file_from_bytes
+from tests.test_masks import random_image
+
+SIZES = (1024, 2048, 4096)
+FORMATS = ("PNG", "WEBP")
+
+
+def legacy_bytes_to_file(data: bytes, format: str) -> io.BytesIO:
+    """The old conversion to a file, which decoded and encoded its input again whatever its format."""
+    with Image.open(io.BytesIO(data)) as image:
+        image_binary = io.BytesIO()
+        image.save(image_binary, format)
+        image_binary.seek(0)
+        return image_binary
+
+
+def measure(func, *args) -> tuple[object, float, int]:
+    """Calls `func`, returning its result, the time taken and the traced peak in bytes."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(sizes: list[int]) -> None:
+    print(
+        f"{'size':>6} {'format':>6} {'output':>9} {'step':>14} {'time':>9} {'peak':>9}"
+    )
+    for size in sizes:
+        image = random_image(size)
+        for format in FORMATS:
+            data, *encoded = measure(encode_image, image, format)
+            steps = {
+                "encode": encoded,
+                "wrap": measure(file_from_bytes, data, "image", format)[1:],
+                "legacy convert": measure(legacy_bytes_to_file, data, format)[1:],
+                "convert": measure(
+                    lambda: file_from_bytes(
+                        asyncio.run(convert_bytes(data, format)), "image", format
+                    )
+                )[1:],
+            }
+            for step, (elapsed, peak) in steps.items():
+                print(
+                    f"{size:>6} {format:>6} {len(data) / 2**20:>6.1f}MiB {step:>14}"
+                    f" {elapsed:>8.3f}s {peak / 2**20:>6.1f}MiB"
+                )
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or list(SIZES))
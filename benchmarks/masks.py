@@ -0,0 +1,37 @@
+"""
+Times `image_to_mask` against the pixel-by-pixel version it replaced.
+
+Run with `python -m benchmarks.masks [sizes...]`. The legacy version takes
+about half a minute at 8192px.
+"""
+
+import sys
+import time
+
+from bot.utils.images import image_to_mask
+from tests.test_masks import legacy_image_to_mask, random_image
+
+SIZES = (512, 2048, 8192)
+
+
+def best_of(func, image, runs: int) -> float:
+    """The fastest of `runs` calls of `func` on `image`, in seconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(image)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'size':>6} {'legacy':>10} {'lut':>10} {'speedup':>8}")
+    for size in sizes:
+        image = random_image(size)
+        legacy = best_of(legacy_image_to_mask, image, 1 if size > 2048 else 3)
+        lut = best_of(image_to_mask, image, 5)
+        print(f"{size:>6} {legacy:>9.3f}s {lut:>9.4f}s {legacy / lut:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or list(SIZES))
@@ -0,0 +1,73 @@
+"""
+Times rendering the server icon preview against the version that reloaded its templates.
+
+Run with `python -m benchmarks.previews [sizes...]`, from the root of the
+repository. The sizes are those of the previewed image, which is resized
+as part of the render, as in the command. Rendering every surface in both
+modes, as `/preview surfaces` does by default, is timed as well.
+"""
+
+import sys
+import time
+
+from PIL import Image
+
+from bot.utils.images import add_background
+from bot.utils.previews import load_previews, prepare_surface, render_previews
+from tests.test_masks import random_image
+
+SIZES = (128, 512, 2048)
+ICON_TEMPLATES = "bot/assets/templates/server_icon/{mode}.png"
+ICON_POSITIONS = [(12, 42), (94, 42), (176, 42)]
+ICON_SIZE = (48, 48)
+
+
+def legacy_server_icon(image: Image.Image, mode: str) -> Image.Image:
+    """The server icon preview as it was, opening and converting its templates every time."""
+    icon = add_background(
+        image.resize(ICON_SIZE), "#202225FF" if mode == "Dark" else "#E2E5E8FF"
+    )
+    with Image.open(ICON_TEMPLATES.format(mode=mode)) as template:
+        preview = Image.new("RGBA", template.size)
+        for position in ICON_POSITIONS:
+            preview.paste(icon, position)
+
+        with Image.open(ICON_TEMPLATES.format(mode="Mask")) as mask:
+            mask = mask.convert("L")
+            return Image.composite(preview, template, mask)
+
+
+def best_of(func, runs: int = 20) -> float:
+    """The fastest of `runs` calls of `func`, in seconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(sizes: list[int]) -> None:
+    config = load_previews()
+    for key in config.surfaces:
+        for mode in config.modes:
+            prepare_surface(key, mode)  # Done by the warm-up when the bot starts.
+
+    print(
+        f"{'size':>6} {'legacy':>10} {'server icon':>12} {'speedup':>8} {'surfaces':>10}"
+    )
+    for size in sizes:
+        image = random_image(size)
+        legacy = best_of(lambda: legacy_server_icon(image, "Dark"))
+        server_icon = best_of(lambda: render_previews(image, ["server_icon"], ["Dark"]))
+        surfaces = best_of(
+            lambda: render_previews(image, config.surfaces, config.modes)
+        )
+        print(
+            f"{size:>6} {legacy * 1000:>8.2f}ms {server_icon * 1000:>10.2f}ms"
+            f" {legacy / server_icon:>7.1f}x {surfaces * 1000:>8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or list(SIZES))
@@ -0,0 +1,33 @@
+"""
+Checks that the cold start of the bot stays within its budget.
+
+Run with `python -m benchmarks.startup [runs]`, from the root of the
+repository. The median of `runs` cold starts is measured with
+`bot.utils.startup`, and the benchmark exits with an error if the bot takes
+longer than `READY_BUDGET` to be ready, so that regressions are caught.
+Warming up happens in the background once the bot is ready, so its budget
+is looser.
+"""
+
+import sys
+
+from bot.utils.startup import benchmark
+
+RUNS = 5
+READY_BUDGET = 1.5  # Seconds from starting the interpreter to being ready.
+WARM_UP_BUDGET = 3.0  # Seconds until the warm-ups are done as well.
+
+
+def main(runs: int) -> None:
+    profile = benchmark(runs)
+    print(f"Median of {runs} cold starts:")
+    print(profile.report())
+
+    if profile.ready > READY_BUDGET:  # type: ignore
+        sys.exit(f"The bot took over {READY_BUDGET}s to be ready.")
+    if profile.warmed_up > WARM_UP_BUDGET:  # type: ignore
+        sys.exit(f"The bot took over {WARM_UP_BUDGET}s to warm up.")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else RUNS)
@@ -0,0 +1,4 @@
+import time
+
+# When the process started importing the bot, for measuring its startup.
+START_TIME = time.perf_counter()
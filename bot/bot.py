@@ -1,12 +1,24 @@
+import asyncio
+import time
 from datetime import datetime
+from pathlib import Path
+from typing import Callable
 
-from disnake import AllowedMentions, Intents
+import aiohttp
+from disnake import AllowedMentions, ApplicationCommandInteraction, Intents
 from disnake.ext import commands
 from loguru import logger
 
-from bot.utils.extensions import EXTENSIONS
+from bot.utils import executor
+from bot.utils.cache import DownloadCache, RenderCache
+from bot.utils.emoji_assets import EmojiAssetStore
+from bot.utils.images import load_image_plugins
+from bot.utils.embeds import create_embed
+from bot.utils.extensions import EXTENSIONS, import_extension_dependencies
+from bot.utils.scheduler import JobScheduler, SchedulerBusy
+from bot.utils.startup import StartupProfile
 
-from . import constants
+from . import START_TIME, constants
 
 
 class Bot(commands.Bot):
@@ -31,7 +43,37 @@ class Bot(commands.Bot):
             bot_kwargs["test_guilds"] = constants.TEST_SERVERS
 
         super().__init__(**bot_kwargs)
+        self.startup = StartupProfile(START_TIME)
+        self.http_session: aiohttp.ClientSession | None = None
+        self.download_cache = DownloadCache(
+            constants.Downloads.cache_size,
+            (
+                Path(constants.Downloads.cache_directory)
+                if constants.Downloads.cache_directory
+                else None
+            ),
+            constants.Downloads.cache_directory_size,
+        )
+        self.render_cache = RenderCache(constants.Renders.cache_size)
+        archive = Path(constants.EmojiData.asset_archive)
+        self.emoji_assets = EmojiAssetStore(
+            Path(constants.EmojiData.asset_directory),
+            archive if archive.exists() else None,
+        )
+        self.scheduler = JobScheduler(
+            constants.Jobs.max_running,
+            constants.Jobs.max_queued,
+            constants.Jobs.max_per_user,
+            constants.Jobs.max_per_guild,
+        )
+        self.warm_ups: dict[str, Callable[[], object]] = {}
+        self._warm_up_task: asyncio.Task | None = None
+        self.add_warm_up(load_image_plugins)
         self.load_extensions()
+        if not constants.Startup.lazy_loading:
+            for func in self.warm_ups.values():
+                func()
+            self.startup.mark_warmed_up()
 
         self.launch_time = datetime.utcnow().timestamp()
 
@@ -40,13 +82,72 @@ class Bot(commands.Bot):
         logger.info("Start loading extensions from ./exts/")
         for ext in EXTENSIONS:
             try:
+                start = time.perf_counter()
+                import_extension_dependencies(ext)
+                imported = time.perf_counter()
                 self.load_extension(ext)
+                self.startup.add_extension(
+                    ext, imported - start, time.perf_counter() - imported
+                )
                 logger.debug(f"Successfully loaded extension: {ext}")
             except Exception as e:
                 logger.error(f"Error when loading extension: {ext}\n{e}")
 
+        self.startup.mark_extensions_loaded()
         logger.info("Finished loading extensions")
 
+    def add_warm_up(self, func: Callable[[], object]) -> None:
+        """
+        Registers `func` to prepare something slow ahead of the first command that needs it.
+
+        With `Startup.lazy_loading`, it's run in a thread once the bot is
+        ready, and otherwise before the bot connects. Commands shouldn't
+        depend on it having run.
+
+        Warm-ups are keyed by their module and qualified name, so that an
+        extension registering its own again after being reloaded replaces
+        the old function instead of adding another.
+        """
+        self.warm_ups[f"{func.__module__}.{func.__qualname__}"] = func
+
+    async def warm_up(self) -> None:
+        """Runs every registered warm-up, one at a time, so that they leave room for commands."""
+        for name, func in list(self.warm_ups.items()):
+            try:
+                await executor.in_executor(func)
+            except Exception:
+                logger.exception(f"Error when warming up with {name}")
+
+        self.startup.mark_warmed_up()
+        logger.info(f"Warmed up after {self.startup.warmed_up:.2f}s")
+
+    async def login(self, token: str) -> None:
+        """Create the shared HTTP session before logging in to Discord."""
+        connector = aiohttp.TCPConnector(
+            limit=constants.HTTP.connection_limit,
+            limit_per_host=constants.HTTP.connection_limit_per_host,
+            keepalive_timeout=constants.HTTP.keepalive_timeout,
+            ttl_dns_cache=constants.HTTP.dns_cache_ttl,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=constants.HTTP.total_timeout,
+            connect=constants.HTTP.connect_timeout,
+            sock_read=constants.HTTP.read_timeout,
+        )
+        self.http_session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+        await super().login(token)
+
+    async def close(self) -> None:
+        """Close the shared HTTP session and executors together with the Discord connection."""
+        await super().close()
+
+        if self.http_session:
+            await self.http_session.close()
+
+        self.emoji_assets.save_index()
+        executor.shutdown()
+
     def run(self) -> None:
         """Run the bot with the token in constants.py/.env ."""
         logger.info("Starting bot")
@@ -61,3 +162,24 @@ class Bot(commands.Bot):
     async def on_ready(self) -> None:
         """Ran when the bot has connected to discord and is ready."""
         logger.info("Bot online")
+        if self.startup.ready is None:
+            self.startup.mark_ready()
+            logger.info(f"Startup profile:\n{self.startup.report()}")
+            if constants.Startup.lazy_loading:
+                self._warm_up_task = asyncio.create_task(self.warm_up())
+
+    async def on_slash_command_error(
+        self, inter: ApplicationCommandInteraction, error: commands.CommandError
+    ) -> None:
+        """Tell the user why a command was turned away, or why their input was rejected."""
+        if isinstance(error, (SchedulerBusy, commands.BadArgument)):
+            embed_type = "warning" if isinstance(error, SchedulerBusy) else "error"
+            embed = create_embed(embed_type, str(error))
+            if inter.response.is_done():
+                # Replace the "thinking" message of a deferred command.
+                await inter.edit_original_message(embed=embed)
+            else:
+                await inter.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        await super().on_slash_command_error(inter, error)
@@ -28,7 +28,90 @@ OUTPUT_IMAGE_FORMATS = [
     "GIF",
     "PDF",
     "WEBP",
-]  # `image_to_file` depends on this being uppercase.
+]  # Formats are looked up in uppercase.
+
+MAX_ATTACHMENTS = 10  # Files Discord allows in a single message.
+DEFAULT_FILESIZE_LIMIT = 8 * 1024**2  # Bytes per file, in DMs and unboosted servers.
+MAX_SKIPPED_SHOWN = 50  # Skipped emojis listed, within the message length limit.
+
+
+@autochain
+class HTTP(NamedTuple):
+    # Connection pool shared by every outgoing request the bot makes.
+    connection_limit = 100
+    connection_limit_per_host = 10
+    keepalive_timeout = 30  # Seconds an idle connection is kept open.
+    dns_cache_ttl = 300  # Seconds a DNS lookup is cached.
+
+    # Timeouts, in seconds.
+    total_timeout = 30
+    connect_timeout = 10
+    read_timeout = 20
+
+
+@autochain
+class Downloads(NamedTuple):
+    max_size = 25 * 1024**2  # Bytes. Larger downloads are aborted.
+    chunk_size = 64 * 1024  # Bytes read from the network at a time.
+
+    cache_size = 64 * 1024**2  # Bytes of downloads kept in memory.
+    cache_max_age = 300  # Seconds a cached download is used without revalidation.
+    cache_directory = None  # Evicted downloads are spilled here, if set.
+    cache_directory_size = 512 * 1024**2  # Bytes kept in `cache_directory`.
+
+
+@autochain
+class Animations(NamedTuple):
+    max_frames = 500  # Animations with more frames are rejected.
+    # Animations with more pixels in all of their frames together are rejected.
+    max_pixels = 32 * 1024**2
+    default_duration = 100  # Milliseconds, for frames that don't specify a duration.
+
+
+@autochain
+class Renders(NamedTuple):
+    cache_size = 64 * 1024**2  # Bytes of command outputs kept in memory.
+
+
+@autochain
+class Executors(NamedTuple):
+    threads = 10  # Workers for light, blocking jobs.
+    processes = None  # Workers for CPU-bound jobs. Defaults to the number of CPUs.
+    heavy_pixels = 2048 * 2048  # Images larger than this are processed in a process.
+    isolated_processes = 2  # Workers for untrusted jobs, which may be killed.
+
+
+@autochain
+class Rasterization(NamedTuple):
+    max_pixels = 4096 * 4096  # Largest allowed output of a rendered SVG.
+    max_scale = 10
+    timeout = 10  # Seconds an SVG may take to render.
+
+
+@autochain
+class Jobs(NamedTuple):
+    max_running = 10  # Image jobs processed at once.
+    max_queued = 50  # Jobs waiting for a slot, before new ones are turned away.
+    max_per_user = 2  # Jobs a single user may have running or waiting.
+    max_per_guild = 10  # Jobs a single guild may have running or waiting.
+
+
+@autochain
+class EmojiData(NamedTuple):
+    index_file = None  # The emoji index is saved here, and loaded on startup, if set.
+    asset_directory = ".cache/emojis"  # Source files of emojis are stored here.
+    asset_archive = "bot/assets/emojis.zip"  # Pre-warms the stored files, if it exists.
+    max_render_size = 2048  # Largest width emojis are rendered at, in pixels.
+    max_pack_size = 300  # Most emojis exported in one pack.
+    max_pack_render_size = 512  # Largest width of the emojis in a pack, in pixels.
+    pack_concurrency = 8  # Emojis of a pack fetched and rendered at once.
+
+
+@autochain
+class Startup(NamedTuple):
+    # Slow preparations, like building the emoji index, are done in the
+    # background once the bot is ready, instead of before it connects.
+    lazy_loading = True
 
 
 class About(NamedTuple):
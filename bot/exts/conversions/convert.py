@@ -1,18 +1,25 @@
-from disnake.ext.commands.errors import BadArgument
+import asyncio
+
 from bot.bot import Bot
-from bot.constants import OUTPUT_IMAGE_FORMATS
+from bot.constants import DEFAULT_FILESIZE_LIMIT, MAX_ATTACHMENTS, OUTPUT_IMAGE_FORMATS
+from bot.utils.cache import render_key
 from bot.utils.executor import in_executor
 from bot.utils.images import (
+    convert_bytes,
     download_bytes,
-    download_image,
+    file_from_bytes,
     filename_from_url,
-    image_to_file,
-    rasterize_svg,
+    image_to_bytes,
+    is_animated,
+    open_image,
+    sniff_format,
+    zip_files,
 )
+from bot.utils.options import OutputFormats
 from disnake import ApplicationCommandInteraction
 from disnake.ext import commands
 
-OutputFormats = commands.option_enum(OUTPUT_IMAGE_FORMATS)
+MAX_BATCH_INPUTS = 10
 
 
 class Convert(commands.Cog):
@@ -21,6 +28,68 @@ class Convert(commands.Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
 
+    @staticmethod
+    def _parse_formats(raw_formats: str) -> list[str]:
+        """Returns the unique output formats in a comma or space separated string."""
+        formats = list(dict.fromkeys(raw_formats.replace(",", " ").upper().split()))
+        if not formats:
+            raise commands.BadArgument("Please provide at least one output format.")
+        if invalid := [f for f in formats if f not in OUTPUT_IMAGE_FORMATS]:
+            raise commands.BadArgument(
+                f"Unsupported format(s): {', '.join(invalid)}. "
+                f"Choose from {', '.join(OUTPUT_IMAGE_FORMATS)}."
+            )
+        return formats
+
+    @staticmethod
+    def _check_size(size: int, max_size: int) -> None:
+        """Raises `BadArgument` if `size` bytes of output can't be uploaded."""
+        if size > max_size:
+            raise commands.BadArgument(
+                f"The converted images would be larger than the {max_size // 1024**2} MB "
+                "Discord allows here. Please pick fewer images or formats."
+            )
+
+    async def _convert_all(self, data: bytes, formats: list[str]) -> dict[str, bytes]:
+        """
+        Converts the encoded image `data` to every format in `formats`.
+
+        The image is decoded at most once, and the encodes run in parallel.
+        """
+        outputs = {}
+        for format in formats:
+            output = self.bot.render_cache.get(
+                render_key(data, "convert", format=format)
+            )
+            if output is None and sniff_format(data) == format:
+                output = data  # Already in the right format.
+            if output is not None:
+                outputs[format] = output
+
+        if missing := [format for format in formats if format not in outputs]:
+            image = await open_image(data)
+            if is_animated(image):
+                # Encoding an animation seeks through the frames of the image, so
+                # the encodes can't share it in parallel, and each one has to
+                # rewind it for the next.
+                encoded = []
+                for format in missing:
+                    image.seek(0)
+                    encoded.append(await image_to_bytes(image, format))
+            else:
+                # Decode once, before the parallel encodes.
+                await in_executor(image.load)
+                encoded = await asyncio.gather(
+                    *(image_to_bytes(image, format) for format in missing)
+                )
+            for format, output in zip(missing, encoded):
+                self.bot.render_cache.put(
+                    render_key(data, "convert", format=format), output
+                )
+                outputs[format] = output
+
+        return outputs
+
     @commands.slash_command()
     async def convert(
         self,
@@ -29,17 +98,91 @@ class Convert(commands.Cog):
         output_format: OutputFormats,
     ) -> None:
         """Converts an image to a given format."""
-        try:
-            image = await download_image(image_url)
-        except commands.BadArgument as e:
-            try:  # It might be a .SVG
-                raw_bytes = (await download_bytes(image_url)).getvalue()
-                image = await in_executor(rasterize_svg,raw_bytes)
-            except BadArgument:
-                raise e  # Raise the original error
-
-        output_file = await image_to_file(image, filename_from_url(image_url), output_format)
-        await inter.response.send_message(file=output_file)
+        async with self.bot.scheduler.job(inter):
+            data = (
+                await download_bytes(
+                    image_url, self.bot.http_session, self.bot.download_cache
+                )
+            ).getvalue()
+
+            key = render_key(data, "convert", format=output_format)
+            if (output := self.bot.render_cache.get(key)) is None:
+                output = await convert_bytes(data, output_format)
+                self.bot.render_cache.put(key, output)
+
+            output_file = file_from_bytes(
+                output, filename_from_url(image_url), output_format
+            )
+            await inter.edit_original_message(file=output_file)
+
+    @commands.slash_command()
+    async def batch_convert(
+        self,
+        inter: ApplicationCommandInteraction,
+        image_urls: str,
+        output_formats: str,
+        as_zip: bool = False,
+    ) -> None:
+        """
+        Converts one or more images to one or more formats at once.
+
+        Parameters
+        ----------
+        image_urls: URLs of the images, separated by spaces
+        output_formats: Formats to convert to, separated by commas, such as "PNG, WEBP, ICO"
+        as_zip: Whether to send the images in a zip file. Large batches are always zipped.
+        """
+        urls = list(dict.fromkeys(image_urls.split()))
+        if not 0 < len(urls) <= MAX_BATCH_INPUTS:
+            raise commands.BadArgument(
+                f"Please provide between 1 and {MAX_BATCH_INPUTS} image URLs."
+            )
+        formats = self._parse_formats(output_formats)
+
+        async with self.bot.scheduler.job(inter):
+            downloads = await asyncio.gather(
+                *(
+                    download_bytes(url, self.bot.http_session, self.bot.download_cache)
+                    for url in urls
+                )
+            )
+            converted = await asyncio.gather(
+                *(self._convert_all(data.getvalue(), formats) for data in downloads)
+            )
+
+            files: list[tuple[str, str, bytes]] = []
+            used_names: set[str] = set()
+            for url, outputs in zip(urls, converted):
+                name = base_name = filename_from_url(url) or "image"
+                number = 1
+                while name in used_names:
+                    number += 1
+                    name = f"{base_name}-{number}"
+                used_names.add(name)
+
+                for format, output in outputs.items():
+                    files.append((name, format, output))
+
+            max_size = (
+                inter.guild.filesize_limit if inter.guild else DEFAULT_FILESIZE_LIMIT
+            )
+            if as_zip or len(files) > MAX_ATTACHMENTS:
+                archive = await in_executor(
+                    zip_files,
+                    {f"{name}.{format.lower()}": data for name, format, data in files},
+                )
+                self._check_size(len(archive), max_size)
+                await inter.edit_original_message(
+                    file=file_from_bytes(archive, "images", "zip")
+                )
+            else:
+                self._check_size(sum(len(data) for _, _, data in files), max_size)
+                await inter.edit_original_message(
+                    files=[
+                        file_from_bytes(data, name, format)
+                        for name, format, data in files
+                    ]
+                )
 
 
 def setup(bot: Bot) -> None:
@@ -0,0 +1,96 @@
+import io
+import time
+
+from bot.bot import Bot
+from bot.utils.cache import render_key
+from bot.utils.executor import in_executor
+from bot.utils.images import (
+    download_bytes,
+    encode_image,
+    filename_from_url,
+    open_image,
+    resize_image,
+    resize_pyramid,
+    square_image,
+    zip_files,
+)
+from disnake import ApplicationCommandInteraction, File
+from disnake.ext import commands
+from PIL import Image
+
+PNG_SIZES = (16, 32, 48, 64, 128, 180, 192, 256, 512)
+ICO_SIZES = (16, 32, 48, 64, 128, 256)  # ICO can't hold images larger than 256px.
+
+
+def build_bundle(image: Image.Image, name: str) -> dict[str, bytes]:
+    """Returns a multi-resolution ICO, and a PNG for every size, from one `image`."""
+    pyramid = resize_pyramid(square_image(image), PNG_SIZES + ICO_SIZES)
+
+    files = {
+        f"{name}-{size}x{size}.png": encode_image(pyramid[size], "PNG")
+        for size in PNG_SIZES
+    }
+
+    ico_images = [pyramid[size] for size in sorted(ICO_SIZES, reverse=True)]
+    with io.BytesIO() as ico:
+        ico_images[0].save(
+            ico,
+            "ICO",
+            sizes=[(size, size) for size in ICO_SIZES],
+            append_images=ico_images[1:],
+        )
+        files[f"{name}.ico"] = ico.getvalue()
+
+    return files
+
+
+class Favicon(commands.Cog):
+    """Commands for generating favicons and app icons"""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+
+    @commands.slash_command()
+    async def favicon(
+        self, inter: ApplicationCommandInteraction, image_url: str
+    ) -> None:
+        """Generates a favicon bundle, with a multi-size ICO and PNGs from 16 to 512 pixels."""
+        async with self.bot.scheduler.job(inter):
+            data = (
+                await download_bytes(
+                    image_url, self.bot.http_session, self.bot.download_cache
+                )
+            ).getvalue()
+            name = filename_from_url(image_url) or "favicon"
+
+            start = time.perf_counter()
+            key = render_key(data, "favicon", name=name)
+            if (archive := self.bot.render_cache.get(key)) is None:
+                largest = max(PNG_SIZES)
+                image = await open_image(data, target_size=(largest, largest))
+                # Large inputs are brought down to the largest size first, so that
+                # only the first step of the pyramid has to work on them.
+                if max(image.size) > largest:
+                    scale = largest / max(image.size)
+                    image = await resize_image(
+                        image,
+                        (
+                            max(1, round(image.width * scale)),
+                            max(1, round(image.height * scale)),
+                        ),
+                    )
+
+                files = await in_executor(build_bundle, image, name)
+                archive = await in_executor(zip_files, files)
+                self.bot.render_cache.put(key, archive)
+            elapsed = (time.perf_counter() - start) * 1000
+
+            await inter.edit_original_message(
+                content=f"Generated the favicon bundle in {elapsed:.0f} ms.",
+                file=File(io.BytesIO(archive), filename=f"{name}-favicon.zip"),
+            )
+
+
+def setup(bot: Bot) -> None:
+    """Loads the Favicon cog."""
+    bot.add_cog(Favicon(bot))
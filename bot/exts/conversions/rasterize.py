@@ -1,18 +1,17 @@
 from bot.bot import Bot
-from bot.constants import OUTPUT_IMAGE_FORMATS
+from bot.constants import Rasterization
+from bot.utils.cache import render_key
 from bot.utils.images import (
     download_bytes,
+    file_from_bytes,
     filename_from_url,
-    image_to_file,
-    rasterize_svg,
+    image_to_bytes,
+    open_image,
 )
+from bot.utils.options import OutputFormats
 from disnake.ext import commands
 from disnake.interactions import ApplicationCommandInteraction
 
-from bot.utils.executor import in_executor
-
-OutputFormats = commands.option_enum(OUTPUT_IMAGE_FORMATS)
-
 
 class Rasterize(commands.Cog):
     """Rasterizes vector graphics"""
@@ -26,16 +25,33 @@ class Rasterize(commands.Cog):
         inter: ApplicationCommandInteraction,
         image_url: str,
         output_format: OutputFormats = "PNG",
-        scale: int = 1,
+        scale: int = commands.param(default=1, gt=0, le=Rasterization.max_scale),
     ) -> None:
-        """Rasterizes a given SVG-file."""
-        await inter.response.defer()
-
-        raw_bytes = (await download_bytes(image_url)).getvalue()
-        image = await in_executor(rasterize_svg, raw_bytes, scale)
-        file = await image_to_file(image, filename_from_url(image_url), output_format)
-
-        await inter.edit_original_message(file=file)
+        """
+        Rasterizes a given SVG-file.
+
+        Parameters
+        ----------
+        scale: The scale of the rasterized image compared to the size of the SVG.
+        """
+        async with self.bot.scheduler.job(inter):
+            data = (
+                await download_bytes(
+                    image_url,
+                    self.bot.http_session,
+                    self.bot.download_cache,
+                    formats={"SVG"},
+                )
+            ).getvalue()
+
+            key = render_key(data, "rasterize", format=output_format, scale=scale)
+            if (output := self.bot.render_cache.get(key)) is None:
+                image = await open_image(data, scale)
+                output = await image_to_bytes(image, output_format)
+                self.bot.render_cache.put(key, output)
+
+            file = file_from_bytes(output, filename_from_url(image_url), output_format)
+            await inter.edit_original_message(file=file)
 
 
 def setup(bot: Bot) -> None:
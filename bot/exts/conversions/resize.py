@@ -3,7 +3,19 @@ from disnake import ApplicationCommandInteraction
 from disnake.ext import commands
 from bot.utils.executor import in_executor
 
-from bot.utils.images import download_image, image_to_file
+from bot.utils.cache import render_key
+from bot.utils.images import (
+    ANIMATED_FORMATS,
+    download_bytes,
+    draft_image,
+    encode_animation,
+    file_from_bytes,
+    image_to_bytes,
+    is_animated,
+    open_image,
+    resize_image,
+    sniff_format,
+)
 
 Size = tuple[int, int]
 
@@ -65,15 +77,37 @@ class Resize(commands.Cog):
         height: New height in pixels
         scale: The scale of the new image compared to the old image. 1 is equal to the current image.
         """
-        await inter.response.defer()
-        image = await download_image(image_url)
-        try:
-            size = await in_executor(Resize._new_size,image.size, width, height, scale)
-        except ValueError as e:
-            raise commands.BadArgument(str(e))
+        async with self.bot.scheduler.job(inter):
+            data = (
+                await download_bytes(
+                    image_url, self.bot.http_session, self.bot.download_cache
+                )
+            ).getvalue()
 
-        image = image.resize(size)
-        await inter.edit_original_message(file=await image_to_file(image))
+            key = render_key(data, "resize", width=width, height=height, scale=scale)
+            if (output := self.bot.render_cache.get(key)) is None:
+                image = await open_image(data)
+                try:
+                    size = await in_executor(
+                        Resize._new_size, image.size, width, height, scale
+                    )
+                except ValueError as e:
+                    raise commands.BadArgument(str(e))
+                draft_image(image, size)
+
+                if is_animated(image) and image.format in ANIMATED_FORMATS:
+                    # Resized frame by frame, keeping the animation and its format.
+                    output = await in_executor(
+                        encode_animation, image, image.format, size
+                    )
+                else:
+                    image = await resize_image(image, size)
+                    output = await image_to_bytes(image)
+                self.bot.render_cache.put(key, output)
+
+            await inter.edit_original_message(
+                file=file_from_bytes(output, "image", sniff_format(output) or "PNG")
+            )
 
 
 def setup(bot: Bot) -> None:
@@ -1,22 +1,21 @@
+import io
 from typing import Literal
 
 import disnake
-from emoji import UNICODE_EMOJI_ENGLISH
 from bot.bot import Bot
 from bot.utils.embeds import create_embed
-from bot.utils.emojis import alias_to_name, codepoint_from_input, get_emoji
+from bot.utils.emoji_assets import NOTO_BASE_URL, asset_url
+from bot.utils.emojis import codepoint_from_input, emoji_choices, emoji_index
 from disnake.ext import commands
 from disnake.interactions import ApplicationCommandInteraction
 
-BASE_URL = "https://raw.githubusercontent.com/googlefonts/noto-emoji/main"
-# https://raw.githubusercontent.com/googlefonts/noto-emoji/main/png/128/emoji_u1f605.png
-
 
 class NotoEmojis(commands.Cog):
     """Utilities for working with Noto Emojis."""
 
     def __init__(self, bot: Bot):
         self.bot = bot
+        bot.add_warm_up(emoji_index)
 
     @staticmethod
     def get_url(
@@ -28,18 +27,19 @@ class NotoEmojis(commands.Cog):
         codepoint = codepoint.replace("-", "_")  # Noto uses underscores for file names
 
         if format == "svg":
-            return f"{BASE_URL}/svg/emoji_u{codepoint}.svg"
-        return f"{BASE_URL}/png/{size}/emoji_u{codepoint}.png"
+            return asset_url("noto", codepoint, "svg")
+        return f"{NOTO_BASE_URL}/png/{size}/emoji_u{codepoint}.png"
 
     @staticmethod
     def build_embed(codepoint: str) -> disnake.Embed:
         """Returns the main embed for the `noto_emoji` commmand."""
-        emoji = "".join(get_emoji(e) for e in codepoint.split("-"))
+        entry = emoji_index().from_codepoint(codepoint)
+        filename = entry.filename("noto")  # type: ignore
 
         embed = create_embed(
-            title=alias_to_name(UNICODE_EMOJI_ENGLISH[emoji]),
-            description=f"{codepoint.replace('-', ' ')}\n[Download svg]({NotoEmojis.get_url(codepoint, 'svg')})",
-            thumbnail_url=NotoEmojis.get_url(codepoint, "png", 128),
+            title=entry.title,  # type: ignore
+            description=f"{codepoint.replace('-', ' ')}\n[Download svg]({NotoEmojis.get_url(filename, 'svg')})",
+            thumbnail_url=f"attachment://{filename}.png",
         )
         return embed
 
@@ -57,7 +57,24 @@ class NotoEmojis(commands.Cog):
                 "please include a valid emoji or emoji codepoint."
             )
 
-        await inter.response.send_message(embed=self.build_embed(codepoint))
+        filename = emoji_index().from_codepoint(codepoint).filename("noto")  # type: ignore
+        if not self.bot.emoji_assets.has("noto", filename, "png"):
+            await inter.response.defer()  # Fetching it from Noto may take a moment.
+        png = await self.bot.emoji_assets.get(
+            "noto", filename, "png", self.bot.http_session  # type: ignore
+        )
+
+        await inter.send(
+            embed=self.build_embed(codepoint),
+            file=disnake.File(io.BytesIO(png), f"{filename}.png"),
+        )
+
+    @noto_emoji.autocomplete("raw_emoji")
+    async def raw_emoji_autocomplete(
+        self, _: ApplicationCommandInteraction, user_input: str
+    ) -> dict[str, str]:
+        """Suggests emojis by name."""
+        return emoji_choices(user_input)
 
 
 def setup(bot: Bot) -> None:
@@ -0,0 +1,222 @@
+import asyncio
+import tempfile
+import zipfile
+from typing import IO
+
+import disnake
+from bot.bot import Bot
+from bot.constants import DEFAULT_FILESIZE_LIMIT, MAX_SKIPPED_SHOWN, EmojiData
+from bot.utils.cache import render_key
+from bot.utils.emoji_assets import AssetUnavailable
+from bot.utils.emojis import (
+    EmojiEntry,
+    codepoint_from_input,
+    emoji_choices,
+    emoji_index,
+    emojis_from_input,
+)
+from bot.utils.images import (
+    convert_bytes,
+    file_from_bytes,
+    render_svg_isolated,
+    svg_size,
+)
+from bot.utils.options import EmojiCategories, EmojiVendors, OutputFormats
+from disnake.ext import commands
+from disnake.interactions import ApplicationCommandInteraction
+
+
+class RenderEmoji(commands.Cog):
+    """Renders emojis from their vector source files."""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+
+    async def render(
+        self, entry: EmojiEntry, vendor: str, size: int, format: str
+    ) -> bytes:
+        """Renders the SVG of the emoji `entry` from `vendor` at the width `size`, in `format`."""
+        svg = await self.bot.emoji_assets.get(
+            vendor, entry.filename(vendor), "svg", self.bot.http_session  # type: ignore
+        )
+
+        key = render_key(svg, "render_emoji", size=size, format=format)
+        if (output := self.bot.render_cache.get(key)) is None:
+            width, height = svg_size(svg) or (1, 1)
+            if width <= 0 or height <= 0:
+                raise commands.BadArgument(
+                    "The source file of that emoji declares an empty size."
+                )
+            render_size = (size, max(1, round(size * height / width)))
+
+            png = await render_svg_isolated(svg, size=render_size)
+            output = await convert_bytes(png, format)
+            self.bot.render_cache.put(key, output)
+        return output
+
+    async def build_pack(
+        self,
+        entries: list[EmojiEntry],
+        vendor: str,
+        size: int,
+        format: str,
+        max_size: int,
+    ) -> tuple[IO[bytes], list[EmojiEntry]]:
+        """
+        Renders every emoji in `entries`, and returns a zip of them along with the emojis `vendor` doesn't have.
+
+        At most `EmojiData.pack_concurrency` emojis are fetched and rendered
+        at once. Each one is written to the zip, in a temporary file, as soon
+        as it's done, so the pack is never held in memory as a whole.
+        Raises `commands.BadArgument` as soon as the zip grows past
+        `max_size` bytes, and passes on any error other than an emoji the
+        vendor doesn't have.
+        """
+        semaphore = asyncio.Semaphore(EmojiData.pack_concurrency)
+
+        async def render(entry: EmojiEntry) -> tuple[EmojiEntry, bytes | None]:
+            async with semaphore:
+                try:
+                    return entry, await self.render(entry, vendor, size, format)
+                except AssetUnavailable:
+                    return entry, None
+
+        too_large = commands.BadArgument(
+            f"The pack would be larger than the {max_size // 1024**2} MB Discord "
+            "allows here. Please pick a smaller size or fewer emojis."
+        )
+        archive = tempfile.TemporaryFile()
+        skipped = []
+        tasks = [asyncio.create_task(render(entry)) for entry in entries]
+        try:
+            with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zip_file:
+                for task in asyncio.as_completed(tasks):
+                    entry, output = await task
+                    if output is None:
+                        skipped.append(entry)
+                        continue
+                    zip_file.writestr(
+                        f"{entry.filename(vendor)}.{format.lower()}", output
+                    )
+                    if archive.tell() > max_size:
+                        raise too_large
+            if archive.tell() > max_size:  # Along with the directory at the end.
+                raise too_large
+        except BaseException:
+            archive.close()
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        archive.seek(0)
+        return archive, skipped  # type: ignore
+
+    @commands.slash_command()
+    async def render_emoji(
+        self,
+        inter: ApplicationCommandInteraction,
+        raw_emoji: str,
+        vendor: EmojiVendors = "twemoji",
+        size: int = commands.param(default=512, gt=0, le=EmojiData.max_render_size),
+        output_format: OutputFormats = "PNG",
+    ) -> None:
+        """
+        Renders an emoji at any size, from the SVG file of the vendor.
+
+        Parameters
+        ----------
+        raw_emoji: The emoji, or its codepoint.
+        vendor: The emoji set to render the emoji from.
+        size: The width of the rendered emoji, in pixels.
+        """
+        try:
+            codepoint = codepoint_from_input(raw_emoji)
+        except ValueError:
+            raise commands.BadArgument(
+                "please include a valid emoji or emoji codepoint."
+            )
+        entry = emoji_index().from_codepoint(codepoint)
+
+        async with self.bot.scheduler.job(inter):
+            output = await self.render(entry, vendor, size, output_format)  # type: ignore
+            file = file_from_bytes(
+                output, f"{entry.filename(vendor)}_{size}", output_format  # type: ignore
+            )
+            await inter.edit_original_message(file=file)
+
+    @commands.slash_command()
+    async def emoji_pack(
+        self,
+        inter: ApplicationCommandInteraction,
+        emojis: str | None = None,
+        category: EmojiCategories | None = None,
+        vendor: EmojiVendors = "twemoji",
+        size: int = commands.param(
+            default=128, gt=0, le=EmojiData.max_pack_render_size
+        ),
+        output_format: OutputFormats = "PNG",
+    ) -> None:
+        """
+        Renders many emojis at once, and sends them in a zip file.
+
+        Parameters
+        ----------
+        emojis: The emojis to render, such as "🐍🍂👍" or "1f40d, 1f342".
+        category: A category of emojis to render, instead of a list.
+        vendor: The emoji set to render the emojis from.
+        size: The width of the rendered emojis, in pixels.
+        """
+        if (emojis is None) == (category is None):
+            raise commands.BadArgument(
+                "Please give either a list of emojis or a category."
+            )
+        if category is not None:
+            entries = emoji_index().category(category)
+        else:
+            try:
+                entries = emojis_from_input(emojis)  # type: ignore
+            except ValueError as e:
+                raise commands.BadArgument(str(e))
+        if not 0 < len(entries) <= EmojiData.max_pack_size:
+            raise commands.BadArgument(
+                f"Please give between 1 and {EmojiData.max_pack_size} emojis."
+            )
+
+        max_size = inter.guild.filesize_limit if inter.guild else DEFAULT_FILESIZE_LIMIT
+        async with self.bot.scheduler.job(inter):
+            archive, skipped = await self.build_pack(
+                entries, vendor, size, output_format, max_size  # type: ignore
+            )
+            with archive:
+                content = None
+                if skipped:
+                    shown = " ".join(
+                        entry.emoji for entry in skipped[:MAX_SKIPPED_SHOWN]
+                    )
+                    more = "…" if len(skipped) > MAX_SKIPPED_SHOWN else ""
+                    content = (
+                        f"Skipped {len(skipped)} emojis the vendor doesn't have: "
+                        f"{shown}{more}"
+                    )
+                if len(skipped) == len(entries):
+                    raise commands.BadArgument(
+                        "The vendor doesn't have any of those emojis."
+                    )
+
+                await inter.edit_original_message(
+                    content=content,
+                    file=disnake.File(archive, f"{vendor}_{size}.zip"),
+                )
+
+    @render_emoji.autocomplete("raw_emoji")
+    async def raw_emoji_autocomplete(
+        self, _: ApplicationCommandInteraction, user_input: str
+    ) -> dict[str, str]:
+        """Suggests emojis by name."""
+        return emoji_choices(user_input)
+
+
+def setup(bot: Bot) -> None:
+    """Loads the RenderEmoji cog."""
+    bot.add_cog(RenderEmoji(bot))
@@ -1,40 +1,37 @@
+import io
 from typing import Literal
 
 import disnake
-from emoji import UNICODE_EMOJI_ENGLISH
 from bot.bot import Bot
 from bot.utils.embeds import create_embed
-from bot.utils.emojis import alias_to_name, codepoint_from_input, get_emoji
+from bot.utils.emoji_assets import ASSET_URLS
+from bot.utils.emojis import codepoint_from_input, emoji_choices, emoji_index
 from disnake.ext import commands
 from disnake.interactions import ApplicationCommandInteraction
 
 
-BASE_URLS = {
-    "png": "https://raw.githubusercontent.com/twitter/twemoji/master/assets/72x72/",
-    "svg": "https://raw.githubusercontent.com/twitter/twemoji/master/assets/svg/",
-}
-
-
 class Twemoji(commands.Cog):
     """Utilities for working with Twemojis."""
 
     def __init__(self, bot: Bot):
         self.bot = bot
+        bot.add_warm_up(emoji_index)
 
     @staticmethod
     def get_url(codepoint: str, format: Literal["png", "svg"]) -> str:
         """Returns a source file URL for the specified Twemoji, in the corresponding format."""
-        return f"{BASE_URLS[format]}{codepoint}.{format}"
+        return ASSET_URLS["twemoji"][format].format(codepoint)
 
     @staticmethod
     def build_embed(codepoint: str) -> disnake.Embed:
         """Returns the main embed for the `twemoji` commmand."""
-        emoji = "".join(get_emoji(e) for e in codepoint.split("-"))
+        entry = emoji_index().from_codepoint(codepoint)
+        filename = entry.filename("twemoji")  # type: ignore
 
         embed = create_embed(
-            title=alias_to_name(UNICODE_EMOJI_ENGLISH[emoji]),
-            description=f"{codepoint.replace('-', ' ')}\n[Download svg]({Twemoji.get_url(codepoint, 'svg')})",
-            thumbnail_url=Twemoji.get_url(codepoint, "png"),
+            title=entry.title,  # type: ignore
+            description=f"{codepoint.replace('-', ' ')}\n[Download svg]({Twemoji.get_url(filename, 'svg')})",
+            thumbnail_url=f"attachment://{filename}.png",
         )
         return embed
 
@@ -52,7 +49,24 @@ class Twemoji(commands.Cog):
                 "please include a valid emoji or emoji codepoint."
             )
 
-        await inter.response.send_message(embed=self.build_embed(codepoint))
+        filename = emoji_index().from_codepoint(codepoint).filename("twemoji")  # type: ignore
+        if not self.bot.emoji_assets.has("twemoji", filename, "png"):
+            await inter.response.defer()  # Fetching it from Twemoji may take a moment.
+        png = await self.bot.emoji_assets.get(
+            "twemoji", filename, "png", self.bot.http_session  # type: ignore
+        )
+
+        await inter.send(
+            embed=self.build_embed(codepoint),
+            file=disnake.File(io.BytesIO(png), f"{filename}.png"),
+        )
+
+    @twemoji.autocomplete("raw_emoji")
+    async def raw_emoji_autocomplete(
+        self, _: ApplicationCommandInteraction, user_input: str
+    ) -> dict[str, str]:
+        """Suggests emojis by name."""
+        return emoji_choices(user_input)
 
 
 def setup(bot: Bot) -> None:
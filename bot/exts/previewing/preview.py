@@ -1,17 +1,25 @@
-from typing import Literal
+import asyncio
+import io
 
+import disnake
 from bot.bot import Bot
+from bot.constants import MAX_ATTACHMENTS
 from bot.utils.executor import in_executor
-from bot.utils.images import add_background, download_image, image_to_file
+from bot.utils.images import file_from_bytes, image_to_bytes, load_image, zip_files
+from bot.utils.previews import (
+    load_previews,
+    prepare_surface,
+    render_previews,
+    required_size,
+)
 from disnake.ext import commands
 from disnake import ApplicationCommandInteraction
-from PIL import Image
 
-ICON_TEMPLATES = "bot/assets/templates/server_icon/{mode}.png"
-ICON_POSITIONS = [(12, 42), (94, 42), (176, 42)]
-ICON_SIZE = (48, 48)
-
-Modes = commands.option_enum(["Dark", "Light"])
+Modes = commands.option_enum(list(load_previews().modes))
+Surfaces = commands.option_enum(
+    {"All": "all"}
+    | {surface.name: key for key, surface in load_previews().surfaces.items()}
+)
 
 
 class Preview(commands.Cog):
@@ -19,11 +27,57 @@ class Preview(commands.Cog):
 
     def __init__(self, bot: Bot):
         self.bot = bot
+        bot.add_warm_up(self.prepare_surfaces)
 
     @staticmethod
-    def background_color(mode: Literal["light", "dark"]) -> str:
-        """Returns an RGBA hexadecimal color based on the mode."""
-        return "#202225FF" if mode == "dark" else "#E2E5E8FF"
+    def prepare_surfaces() -> None:
+        """Prepares the templates of every surface and mode, ahead of the first preview."""
+        config = load_previews()
+        for key in config.surfaces:
+            for mode in config.modes:
+                prepare_surface(key, mode)
+
+    async def send_previews(
+        self,
+        inter: ApplicationCommandInteraction,
+        file_url: str,
+        keys: list[str],
+        modes: list[str],
+    ) -> None:
+        """
+        Renders the image at `file_url` on the given surfaces, and sends one file per surface and mode.
+
+        If there are more than Discord allows in one message, they're sent in a zip file.
+        """
+        async with self.bot.scheduler.job(inter):
+            image = await load_image(
+                file_url,
+                self.bot.http_session,
+                self.bot.download_cache,
+                target_size=required_size(keys),
+            )
+            previews = await in_executor(render_previews, image, keys, modes)
+
+            outputs = await asyncio.gather(
+                *(image_to_bytes(preview) for preview in previews.values())
+            )
+            names = [f"{key}_{mode.lower()}" for key, mode in previews]
+
+            if len(outputs) > MAX_ATTACHMENTS:
+                archive = await in_executor(
+                    zip_files,
+                    {f"{name}.png": output for name, output in zip(names, outputs)},
+                )
+                await inter.edit_original_message(
+                    file=disnake.File(io.BytesIO(archive), filename="previews.zip")
+                )
+            else:
+                await inter.edit_original_message(
+                    files=[
+                        file_from_bytes(output, name, "PNG")
+                        for name, output in zip(names, outputs)
+                    ]
+                )
 
     @commands.slash_command()
     async def preview(self, _: ApplicationCommandInteraction) -> None:
@@ -35,22 +89,30 @@ class Preview(commands.Cog):
         self, inter: ApplicationCommandInteraction, file_url: str, mode: Modes = "Dark"
     ) -> None:
         """Sends a preview of the given image, in different states."""
-        icon = (await download_image(file_url)).resize(ICON_SIZE)
-        icon = add_background(icon, Preview.background_color(mode.lower()))  # type: ignore
-
-        def _preview():
-            with Image.open(ICON_TEMPLATES.format(mode=mode)) as template:
-                preview = Image.new("RGBA", template.size)
-                for position in ICON_POSITIONS:
-                    preview.paste(icon, position)
+        await self.send_previews(inter, file_url, ["server_icon"], [mode])
 
-                with Image.open(ICON_TEMPLATES.format(mode="Mask")) as mask:
-                    mask = mask.convert("L")
-                    return Image.composite(preview, template, mask)
+    @preview.sub_command()
+    async def surfaces(
+        self,
+        inter: ApplicationCommandInteraction,
+        file_url: str,
+        surface: Surfaces = "all",
+        mode: Modes | None = None,
+    ) -> None:
+        """
+        Sends previews of the given image on Discord surfaces, such as avatars and emojis.
 
-        preview = await in_executor(_preview)
+        Parameters
+        ----------
+        file_url: The URL of the image to preview.
+        surface: The surface to preview the image on. Defaults to all of them.
+        mode: The mode to preview the image in. Defaults to both.
+        """
+        config = load_previews()
+        keys = list(config.surfaces) if surface == "all" else [surface]
+        modes = list(config.modes) if mode is None else [mode]
 
-        await inter.response.send_message(file=await image_to_file(preview))
+        await self.send_previews(inter, file_url, keys, modes)  # type: ignore
 
 
 def setup(bot: Bot) -> None:
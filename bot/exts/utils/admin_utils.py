@@ -5,11 +5,14 @@ import re
 import textwrap
 import traceback
 from io import StringIO
+from pathlib import Path
 from typing import Any
 
 import disnake
 from bot.bot import Bot
+from bot.constants import EmojiData
 from bot.utils.embeds import create_embed
+from bot.utils.executor import in_executor
 from bot.utils.helpers import find_nth_occurrence
 from disnake.channel import TextChannel
 from disnake.errors import Forbidden, HTTPException, NotFound
@@ -71,6 +74,19 @@ class AdminUtils(commands.Cog):
             )
             await ctx.send(embed=embed)
 
+    @commands.command(aliases=("exportemojis",))
+    @commands.is_owner()
+    async def export_emojis(self, ctx: Context) -> None:
+        """Saves the stored emoji assets to the archive that pre-warms the store on startup."""
+        archive = Path(EmojiData.asset_archive)
+        await in_executor(self.bot.emoji_assets.export, archive)
+
+        embed = create_embed(
+            "confirmation",
+            f"Exported {archive.stat().st_size // 1024} KB of emoji assets to `{archive}`.",
+        )
+        await ctx.send(embed=embed)
+
     def _format(self, inp: str, out: Any) -> tuple[str, disnake.Embed | None]:
         """Format the eval output into a string & attempt to format it into an Embed."""
         self._ = out
@@ -208,9 +224,7 @@ async def func():  # (None,) -> Any
             return _
     finally:
         self.env.update(locals())
-""".format(
-            textwrap.indent(code, "            ")
-        )
+""".format(textwrap.indent(code, "            "))
 
         try:
             exec(code_, self.env)  # noqa: B102,S102
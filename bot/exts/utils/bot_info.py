@@ -47,6 +47,27 @@ class BotInfo(commands.Cog):
             name="Members",
             value=sum([guild.member_count for guild in guilds]),
         )
+        for name, cache in (
+            ("Download cache", self.bot.download_cache.stats),
+            ("Render cache", self.bot.render_cache.stats),
+        ):
+            embed.add_field(
+                name=name,
+                value=f"{cache['hits']} hits, {cache['misses']} misses\n"
+                f"{cache['items']} files, {humanize.naturalsize(cache['size'])}",
+            )
+        startup = self.bot.startup
+        if startup.ready is not None:
+            value = f"Ready in {startup.ready:.2f}s"
+            if startup.warmed_up is not None:
+                value += f"\nWarmed up in {startup.warmed_up:.2f}s"
+            embed.add_field(name="Startup", value=value)
+        assets = self.bot.emoji_assets.stats
+        embed.add_field(
+            name="Emoji assets",
+            value=f"{assets['hits']} hits, {assets['fetches']} fetches\n"
+            f"{assets['items']} files",
+        )
 
         await inter.response.send_message(embed=embed)
 
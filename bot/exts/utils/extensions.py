@@ -1,13 +1,19 @@
+import asyncio
 import functools
+import importlib
+import sys
+import time
 import typing as t
 from enum import Enum
+from graphlib import TopologicalSorter
 
 from bot import exts
 from bot.bot import Bot
 from bot.constants import Emojis
 from bot.converters import Extension
+from bot.utils import executor
 from bot.utils.embeds import create_embed
-from bot.utils.extensions import EXTENSIONS
+from bot.utils.extensions import EXTENSIONS, SourceTracker, module_dependencies
 from bot.utils.pagination import LinePaginator
 from disnake.ext import commands
 from disnake.ext.commands import Context, group
@@ -17,6 +23,17 @@ UNLOAD_BLACKLIST = {
     f"{exts.__name__}.utils.extensions",
 }
 BASE_PATH_LEN = len(exts.__name__.split("."))
+RELOADABLE_PACKAGE = "bot.utils."
+# Modules the rest of the bot keeps references to, such as the classes of the
+# caches and the scheduler `Bot` holds instances of, so changes to them need a restart.
+RELOAD_BLACKLIST = {
+    "bot.utils.cache",
+    "bot.utils.emoji_assets",
+    "bot.utils.executor",
+    "bot.utils.extensions",
+    "bot.utils.scheduler",
+    "bot.utils.startup",
+}
 
 
 class Action(Enum):
@@ -33,6 +50,9 @@ class Extensions(commands.Cog):
 
     def __init__(self, bot: Bot):
         self.bot = bot
+        self.sources = SourceTracker()
+        for module in module_dependencies():
+            self.sources.record(module)
 
     @group(
         name="extensions",
@@ -57,7 +77,7 @@ class Extensions(commands.Cog):
         if "*" in extensions or "**" in extensions:
             extensions = set(EXTENSIONS) - set(self.bot.extensions.keys())
 
-        msg, did_error = self.batch_manage(Action.LOAD, *extensions)  # type: ignore
+        msg, did_error = await self.batch_manage(Action.LOAD, *extensions)  # type: ignore
         embed = create_embed("error" if did_error else "confirmation", msg)
         await ctx.send(embed=embed)
 
@@ -83,7 +103,7 @@ class Extensions(commands.Cog):
             if "*" in extensions or "**" in extensions:
                 extensions = set(self.bot.extensions.keys()) - UNLOAD_BLACKLIST
 
-            msg, did_error = self.batch_manage(Action.UNLOAD, *extensions)
+            msg, did_error = await self.batch_manage(Action.UNLOAD, *extensions)
 
         embed = create_embed("error" if did_error else "confirmation", msg)
         await ctx.send(embed=embed)
@@ -108,7 +128,22 @@ class Extensions(commands.Cog):
             extensions = set(self.bot.extensions.keys()) | set(extensions)
             extensions.remove("*")
 
-        msg, did_error = self.batch_manage(Action.RELOAD, *extensions)
+        msg, did_error = await self.batch_manage(Action.RELOAD, *extensions)
+        embed = create_embed("error" if did_error else "confirmation", msg)
+        await ctx.send(embed=embed)
+
+    @extensions_group.command(name="refresh", aliases=("rf",))
+    async def refresh_command(self, ctx: Context) -> None:
+        """
+        Reload only the loaded extensions whose source, or the source of a `bot.utils` module they use, changed.
+
+        Changed `bot.utils` modules are reloaded first, after the modules they
+        depend on, followed by every module and extension depending on them.
+        The process pools are restarted, so that their workers import the
+        reloaded modules again. Changes to other modules are listed, since
+        they need a restart.
+        """
+        msg, did_error = await self.refresh()
         embed = create_embed("error" if did_error else "confirmation", msg)
         await ctx.send(embed=embed)
 
@@ -156,11 +191,105 @@ class Extensions(commands.Cog):
 
         return categories
 
-    def batch_manage(self, action: Action, *extensions: str) -> tuple[str, bool]:
+    def is_reloadable(self, module: str) -> bool:
+        """Return whether `module` can be reloaded without restarting the bot."""
+        if module in self.bot.extensions:
+            return True
+        return module.startswith(RELOADABLE_PACKAGE) and module not in RELOAD_BLACKLIST
+
+    def refresh_warm_ups(self, modules: t.Iterable[str]) -> None:
+        """Replace the warm-ups defined at the top level of the reloaded `modules` with their new versions."""
+        modules = set(modules)
+        for func in list(self.bot.warm_ups.values()):
+            if func.__module__ in modules and (
+                new := getattr(sys.modules[func.__module__], func.__qualname__, None)
+            ):
+                self.bot.add_warm_up(new)
+
+    async def refresh(self) -> tuple[str, bool]:
+        """Reload the modules and extensions affected by changed sources, and return a message with the results."""
+        dependencies = module_dependencies()
+        changed = {
+            module
+            for module in dependencies
+            if module in sys.modules and self.sources.changed(module)
+        }
+        if not changed:
+            return "No extensions changed.", False
+
+        dependents: dict[str, set[str]] = {}
+        for module, imported in dependencies.items():
+            for dependency in imported:
+                dependents.setdefault(dependency, set()).add(module)
+
+        # Everything using a changed module has to be reloaded to pick it up.
+        affected = {module for module in changed if self.is_reloadable(module)}
+        pending = list(affected)
+        while pending:
+            for dependent in dependents.get(pending.pop(), ()):
+                if dependent not in affected and self.is_reloadable(dependent):
+                    affected.add(dependent)
+                    pending.append(dependent)
+
+        order = TopologicalSorter(
+            {module: dependencies[module] & affected for module in affected}
+        ).static_order()
+        timings, failures = {}, {}
+        for module in order:
+            if failed := dependencies[module] & failures.keys():
+                failures[module] = f"Skipped, since {min(failed)} failed."
+                continue
+
+            start = time.perf_counter()
+            try:
+                if module in self.bot.extensions:
+                    self.bot.reload_extension(module)
+                else:
+                    importlib.reload(sys.modules[module])
+            except Exception as e:
+                if hasattr(e, "original"):
+                    e = e.original
+                logger.exception(f"Module '{module}' failed to reload.")
+                failures[module] = f"{e.__class__.__name__}: {e}"
+            else:
+                timings[module] = time.perf_counter() - start
+                self.sources.record(module)
+            await asyncio.sleep(0)  # Let other events through between modules.
+
+        if timings:
+            # Workers of the process pools keep the modules they imported before.
+            executor.restart_process_pools()
+            self.refresh_warm_ups(timings)
+
+        if affected:
+            msg = f"{len(timings)} / {len(affected)} modules reloaded."
+        else:
+            msg = "No extensions changed."
+        if timings:
+            lines = "\n".join(
+                f"{module}  {seconds * 1000:.1f}ms"
+                for module, seconds in timings.items()
+            )
+            msg += f"```\n{lines}```"
+            msg += "\nThe process pools were restarted, to pick up the changes."
+        if failures:
+            lines = "\n".join(
+                f"{module}\n    {err}" for module, err in failures.items()
+            )
+            msg += f"\n**Failures:**```\n{lines}```"
+        if restart := sorted(changed - affected - EXTENSIONS):
+            lines = "\n".join(restart)
+            msg += f"\n**Changed, but only applied on restart:**```\n{lines}```"
+
+        logger.debug(f"Refreshed {len(timings)} modules.")
+        return msg, bool(failures or restart)
+
+    async def batch_manage(self, action: Action, *extensions: str) -> tuple[str, bool]:
         """
         Apply an action to multiple extensions and return a message with the results.
 
-        If only one extension is given, it is deferred to `manage()`.
+        If only one extension is given, it is deferred to `manage()`. The event
+        loop gets to run between extensions, so that the bot stays responsive.
         """
         if len(extensions) == 1:
             msg, error_msg = self.manage(action, extensions[0])
@@ -173,6 +302,7 @@ class Extensions(commands.Cog):
             _, error = self.manage(action, extension)
             if error:
                 failures[extension] = error
+            await asyncio.sleep(0)
 
         msg = f"{len(extensions) - len(failures)} / {len(extensions)} extensions {verb}ed."
         status = bool(failures)
@@ -209,6 +339,8 @@ class Extensions(commands.Cog):
         else:
             msg = f"Extension successfully {verb}ed: `{ext}`."
             logger.debug(msg[10:])
+            if action is not Action.UNLOAD:
+                self.sources.record(ext)
 
         return msg, error_msg
 
@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from pathlib import Path
+from typing import Generic, Hashable, NamedTuple, TypeVar
+
+from loguru import logger
+
+from bot.utils.executor import in_executor
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A least-recently-used cache, bounded by the total size of its values in bytes.
+
+    `sizeof` is used to get the size of a value. When the total size exceeds
+    `max_size`, the least recently used values are evicted until it fits again.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[K, V] = OrderedDict()
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def sizeof(value: V) -> int:
+        """Returns the size of `value` in bytes."""
+        return len(value)  # type: ignore
+
+    def get(self, key: K) -> V | None:
+        """Returns the value of `key` and marks it as recently used, or `None` if it isn't cached."""
+        try:
+            value = self._items[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        """Adds `value` to the cache, evicting the least recently used values if necessary."""
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return  # It would evict everything else, and still not fit.
+
+        self.pop(key)
+        self._items[key] = value
+        self.size += size
+
+        while self.size > self.max_size:
+            old_key, old_value = self._items.popitem(last=False)
+            self.size -= self.sizeof(old_value)
+            self.on_evict(old_key, old_value)
+
+    def pop(self, key: K) -> V | None:
+        """Removes `key` from the cache and returns its value, or `None` if it isn't cached."""
+        value = self._items.pop(key, None)
+        if value is not None:
+            self.size -= self.sizeof(value)
+        return value
+
+    def on_evict(self, key: K, value: V) -> None:
+        """Called with every value evicted to make room for new ones."""
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Counters describing the usage of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "items": len(self),
+            "size": self.size,
+        }
+
+
+class RenderCache(LRUCache[tuple, bytes]):
+    """
+    Cache of encoded command outputs.
+
+    Keys are created with `render_key`, so that the same operation on the
+    same input is only rendered once, no matter which URL it came from.
+    """
+
+
+def render_key(data: bytes, operation: str, **params: Hashable) -> tuple:
+    """
+    Returns the `RenderCache` key of `operation` applied to the input file `data`.
+
+    `params` should be normalized by the caller (for example, formats in
+    uppercase), so that equivalent requests share a key.
+    """
+    return (
+        hashlib.sha256(data).hexdigest(),
+        operation,
+        tuple(sorted(params.items())),
+    )
+
+
+class CachedDownload(NamedTuple):
+    """A downloaded file, along with the validators needed to revalidate it."""
+
+    data: bytes
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since the file was downloaded or last revalidated."""
+        return time.time() - self.fetched_at
+
+    def refreshed(self) -> "CachedDownload":
+        """Returns a copy of the download, marked as fetched now."""
+        return self._replace(fetched_at=time.time())
+
+
+class DownloadCache(LRUCache[str, CachedDownload]):
+    """
+    Cache of downloaded files, keyed by URL.
+
+    If a `directory` is given, downloads evicted from memory are spilled to
+    it in a thread, and read back from there on the next lookup. The contents
+    are stored by their hash, so URLs leading to the same file share one copy
+    on disk.
+    """
+
+    def __init__(
+        self, max_size: int, directory: Path | None = None, directory_size: int = 0
+    ):
+        super().__init__(max_size)
+        self.directory = directory
+        self.directory_size = directory_size
+        self.revalidations = 0
+        self._spill_tasks: set[asyncio.Task] = set()
+
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def sizeof(value: CachedDownload) -> int:
+        """Returns the size of the downloaded data in bytes."""
+        return len(value.data)
+
+    def get(self, url: str) -> CachedDownload | None:
+        """Returns the cached download of `url`, looking on disk if it was evicted from memory."""
+        if (download := super().get(url)) is not None:
+            return download
+        if (download := self._read_spilled(url)) is not None:
+            self.misses -= 1  # The lookup in memory didn't count as a miss after all.
+            self.hits += 1
+            self.put(url, download)
+        return download
+
+    def on_evict(self, url: str, download: CachedDownload) -> None:
+        """Spills the evicted download to the cache directory, if there is one."""
+        if self.directory is None:
+            return
+
+        task = asyncio.create_task(in_executor(self._spill, url, download))
+        self._spill_tasks.add(task)  # Keeps a reference until it's done.
+        task.add_done_callback(self._spill_tasks.discard)
+
+    def _spill(self, url: str, download: CachedDownload) -> None:
+        """Writes `download` to the cache directory, and trims it. This is blocking."""
+        data_path = self.directory / f"{hashlib.sha256(download.data).hexdigest()}.bin"
+        try:
+            if not data_path.exists():
+                data_path.write_bytes(download.data)
+            self._metadata_path(url).write_text(
+                json.dumps(
+                    {
+                        "data": data_path.name,
+                        "etag": download.etag,
+                        "last_modified": download.last_modified,
+                        "fetched_at": download.fetched_at,
+                    }
+                )
+            )
+        except OSError as e:
+            logger.warning(f"Could not spill download of {url} to disk: {e}")
+            return
+
+        self._trim_directory()
+
+    def _metadata_path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode()).hexdigest()}.json"  # type: ignore
+
+    def _read_spilled(self, url: str) -> CachedDownload | None:
+        if self.directory is None:
+            return None
+
+        try:
+            metadata = json.loads(self._metadata_path(url).read_text())
+            data = (self.directory / metadata["data"]).read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return CachedDownload(
+            data, metadata["etag"], metadata["last_modified"], metadata["fetched_at"]
+        )
+
+    def _trim_directory(self) -> None:
+        """Removes the oldest files in the cache directory, until it fits `directory_size`."""
+        files = sorted(self.directory.iterdir(), key=lambda f: f.stat().st_mtime)  # type: ignore
+        total = sum(f.stat().st_size for f in files)
+
+        for file in files:
+            if total <= self.directory_size:
+                break
+            total -= file.stat().st_size
+            with suppress(OSError):
+                file.unlink()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Counters describing the usage of the cache."""
+        return super().stats | {"revalidations": self.revalidations}
@@ -1,7 +1,5 @@
-from contextlib import suppress
 from pathlib import Path
 from typing import Type
-from bot.utils.helpers import get_class_attributes
 
 import yaml
 from loguru import logger
@@ -66,13 +64,15 @@ def autochain(cls: Type) -> Type:
     <:warn:928492358574702592>
     """
 
+    overrides = _YAML_CONFIG.get(cls.__name__.lower())
+    if not overrides:
+        return cls
+
+    # The defaults are inherited, so only the overridden attributes are set.
     class ChainClass(cls):
         pass
 
-    for attr in get_class_attributes(cls):
-        setattr(ChainClass, *attr)
-    with suppress(KeyError):
-        for name, value in _YAML_CONFIG[cls.__name__.lower()].items():
-            setattr(ChainClass, name, value)
+    for name, value in overrides.items():
+        setattr(ChainClass, name, value)
 
     return ChainClass
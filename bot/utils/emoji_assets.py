@@ -0,0 +1,235 @@
+import asyncio
+import json
+import zipfile
+from collections import Counter
+from pathlib import Path
+
+import aiohttp
+from disnake.ext import commands
+from loguru import logger
+
+from bot.utils.emojis import noto_region
+from bot.utils.executor import in_executor
+from bot.utils.images import read_capped
+
+TWEMOJI_BASE_URL = "https://raw.githubusercontent.com/twitter/twemoji/master/assets"
+NOTO_BASE_URL = "https://raw.githubusercontent.com/googlefonts/noto-emoji/main"
+
+# Source file URLs of every vendor and format, by the vendor's file name of the emoji.
+ASSET_URLS = {
+    "twemoji": {
+        "png": TWEMOJI_BASE_URL + "/72x72/{}.png",
+        "svg": TWEMOJI_BASE_URL + "/svg/{}.svg",
+    },
+    "noto": {
+        "png": NOTO_BASE_URL + "/png/128/emoji_u{}.png",
+        "svg": NOTO_BASE_URL + "/svg/emoji_u{}.svg",
+    },
+}
+# Noto keeps the SVGs of flags apart from the other emojis, named by region code.
+NOTO_FLAG_URL = NOTO_BASE_URL + "/third_party/region-flags/svg/{}.svg"
+# Seconds changes to the index are collected for, before saving it.
+INDEX_SAVE_DELAY = 5
+
+
+def _noto_flag_region(vendor: str, filename: str, format: str) -> str | None:
+    """Returns the region code that the asset is named by, if it's the SVG of a Noto flag."""
+    if vendor == "noto" and format == "svg":
+        return noto_region(filename)
+    return None
+
+
+def asset_url(vendor: str, filename: str, format: str) -> str:
+    """Returns the URL of the source file of an emoji, by the `vendor`'s file name of it."""
+    if (region := _noto_flag_region(vendor, filename, format)) is not None:
+        return NOTO_FLAG_URL.format(region)
+    return ASSET_URLS[vendor][format].format(filename)
+
+
+class AssetUnavailable(commands.BadArgument):
+    """Raised when a vendor doesn't have the requested emoji."""
+
+    def __init__(self):
+        super().__init__("That emoji isn't available from this vendor.")
+
+
+class EmojiAssetStore:
+    """
+    Local copies of the source files of emojis, fetched from their vendors on first use.
+
+    Files are stored in `directory` as `<vendor>/<format>/<filename>.<format>`,
+    and an index of them is kept in `index.json`, along with the files the
+    vendors don't have, so that those aren't requested again either.
+
+    The store can be pre-warmed from a zip `archive` with the same layout,
+    so that the bot works without reaching the vendors at all. Call
+    `save_index` before exiting, since changes to the index are saved in
+    batches.
+    """
+
+    def __init__(self, directory: Path, archive: Path | None = None):
+        self.directory = directory
+        self.index_path = directory / "index.json"
+        self.hits = 0
+        self.fetches = 0
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._lock_users: Counter[str] = Counter()
+        self._save_task: asyncio.Task | None = None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            self.index: dict[str, bool] = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            self.index = {}
+
+        if archive is not None:
+            self.prewarm(archive)
+
+    @staticmethod
+    def key(vendor: str, filename: str, format: str) -> str:
+        """Returns the path of an asset in the store, relative to its directory."""
+        name = _noto_flag_region(vendor, filename, format) or filename
+        return f"{vendor}/{format}/{name}.{format}"
+
+    def has(self, vendor: str, filename: str, format: str) -> bool:
+        """Returns whether the asset is known, so that getting it won't reach the vendor."""
+        return self.key(vendor, filename, format) in self.index
+
+    def prewarm(self, archive: Path) -> None:
+        """Extracts the assets in the zip `archive` that aren't in the store yet."""
+        try:
+            with zipfile.ZipFile(archive) as zip_file:
+                names = [
+                    name
+                    for name in zip_file.namelist()
+                    if not name.endswith("/") and not self.index.get(name)
+                ]
+                for name in names:
+                    zip_file.extract(name, self.directory)
+                    self.index[name] = True
+        except (OSError, zipfile.BadZipFile) as e:
+            logger.warning(f"Could not pre-warm the emoji assets from {archive}: {e}")
+            return
+
+        if names:
+            self.save_index()
+        logger.info(f"Pre-warmed {len(names)} emoji assets from {archive}.")
+
+    def export(self, archive: Path) -> None:
+        """Writes every stored asset to the zip `archive`, to pre-warm other stores with."""
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            for key, available in self.index.items():
+                if available:
+                    zip_file.write(self.directory / key, key)
+
+    async def get(
+        self,
+        vendor: str,
+        filename: str,
+        format: str,
+        session: aiohttp.ClientSession,
+    ) -> bytes:
+        """
+        Returns the source file of an emoji, fetching it from `vendor` if it isn't stored yet.
+
+        `filename` should follow the conventions of the vendor (see
+        `EmojiEntry.filename`). Concurrent requests for the same asset share
+        one fetch. Raises `AssetUnavailable` if the vendor doesn't have it,
+        and `commands.BadArgument` if it can't be fetched right now.
+        """
+        key = self.key(vendor, filename, format)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._lock_users[key] += 1
+        try:
+            async with lock:
+                if (data := self._read(key)) is not None:
+                    self.hits += 1
+                    return data
+                url = asset_url(vendor, filename, format)
+                return await self._fetch(key, url, session)
+        finally:
+            self._lock_users[key] -= 1
+            if not self._lock_users[key]:  # Nobody else is waiting on it.
+                del self._lock_users[key]
+                del self._locks[key]
+
+    def _read(self, key: str) -> bytes | None:
+        available = self.index.get(key)
+        if available is None:
+            return None
+        if not available:
+            raise AssetUnavailable()
+
+        try:
+            return (self.directory / key).read_bytes()
+        except OSError:
+            del self.index[key]  # Removed from disk, so fetch it again.
+            return None
+
+    async def _fetch(self, key: str, url: str, session: aiohttp.ClientSession) -> bytes:
+        logger.debug(f"Fetching emoji asset {key} from {url}.")
+        self.fetches += 1
+        try:
+            async with session.get(url) as resp:
+                if resp.status == 404:
+                    self.index[key] = False
+                    self._schedule_save()
+                    raise AssetUnavailable()
+                if resp.status != 200:
+                    raise commands.BadArgument(
+                        "The emoji source file can't be accessed right now."
+                    )
+                data = await read_capped(url, resp, {key.rsplit(".", 1)[1].upper()})
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            raise commands.BadArgument(
+                "The emoji source file can't be accessed right now."
+            )
+
+        path = self.directory / key
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            self.index[key] = True
+            self._schedule_save()
+        except OSError as e:
+            logger.warning(f"Could not store emoji asset {key}: {e}")
+        return data
+
+    def _schedule_save(self) -> None:
+        """Saves the index in a thread after `INDEX_SAVE_DELAY`, with any other changes until then."""
+        if self._save_task is None:
+            self._save_task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self) -> None:
+        await asyncio.sleep(INDEX_SAVE_DELAY)
+        self._save_task = None  # Changes from now on are saved by the next task.
+        await in_executor(self.save_index, dict(self.index))
+
+    def save_index(self, index: dict[str, bool] | None = None) -> None:
+        """
+        Writes the index next to the assets, replacing the old one in one step.
+
+        Pass a copy as `index` when running this in a thread, since the
+        index may change while it's being written.
+        """
+        if index is None:
+            index = self.index
+            if self._save_task is not None:
+                self._save_task.cancel()
+                self._save_task = None
+
+        temporary = self.index_path.with_suffix(".tmp")
+        try:
+            temporary.write_text(json.dumps(index, separators=(",", ":")))
+            temporary.replace(self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not save the emoji asset index: {e}")
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Counters describing the usage of the store."""
+        return {
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "items": sum(self.index.values()),
+        }
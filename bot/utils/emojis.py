@@ -1,7 +1,36 @@
+import bisect
+import functools
+import itertools
+import json
 import re
-from emoji import is_emoji
+import sys
+from pathlib import Path
+from typing import Callable, Iterable, NamedTuple
 
-CODE_REGEX = re.compile(r"[a-f1-9][a-f0-9]{3,5}$")
+from bot.constants import EmojiData
+from loguru import logger
+
+ZWJ = "200d"
+VARIATION_SELECTOR = "fe0f"
+AUTOCOMPLETE_LIMIT = 25  # The most choices Discord shows.
+PARSE_CACHE_SIZE = 4096  # Inputs of `codepoint_from_input` remembered.
+
+# A single codepoint, such as "1f1f8", "U+1F1F8", "0x1f1f8" or "\U0001f1f8".
+HEX_CODE_REGEX = re.compile(r"(?:u\+|\\u|\\x|0x)?0*([0-9a-f]{2,6})", re.IGNORECASE)
+CODE_SEPARATOR_REGEX = re.compile(r"[\s,_-]+")
+
+# Code points that extend an emoji, rather than starting a new one.
+EMOJI_MODIFIERS = {
+    0xFE0F,  # Variation selector, for emoji presentation.
+    0x20E3,  # Combining enclosing keycap.
+    *range(0x1F3FB, 0x1F400),  # Skin tones.
+    *range(0xE0020, 0xE0080),  # Tags, in subdivision flags such as England's.
+}
+JOINER = 0x200D
+REGIONAL_INDICATORS = range(0x1F1E6, 0x1F200)
+WAVING_BLACK_FLAG = 0x1F3F4
+CANCEL_TAG = 0xE007F
+KEYCAP = "\u20e3"
 
 
 def alias_to_name(alias: str) -> str:
@@ -30,59 +59,391 @@ def get_codepoint(emoji: str) -> str:
     return hex(ord(emoji))[2:]
 
 
-def trim_code(codepoint: str | None) -> str | None:
+def twemoji_filename(codepoint: str) -> str:
     """
-    Returns the meaningful information from the given `codepoint`.
+    Returns the name Twemoji uses for the source files of the emoji `codepoint`.
 
-    If no codepoint is found, `None` is returned.
+    Twemoji drops the variation selector (FE0F), except in ZWJ sequences.
+    """
+    codes = codepoint.split("-")
+    if ZWJ not in codes:
+        codes = [code for code in codes if code != VARIATION_SELECTOR]
+    return "-".join(codes)
 
-    Example usages:
-    >>> trim_code("U+1f1f8")
-    "1f1f8"
-    >>> trim_code("\u0001f1f8")
-    "1f1f8"
-    >>> trim_code("1f466")
-    "1f466"
+
+def noto_filename(codepoint: str) -> str:
+    """
+    Returns the name Noto uses for the source files of the emoji `codepoint`.
+
+    Noto always drops the variation selector (FE0F), pads codes to at least
+    four digits, and separates them with underscores.
+    """
+    return "_".join(
+        code.zfill(4) for code in codepoint.split("-") if code != VARIATION_SELECTOR
+    )
+
+
+def noto_region(filename: str) -> str | None:
+    """
+    Returns the region code of the flag with the Noto file name `filename`, or `None` for other emojis.
+
+    Noto names the SVGs of flags after their region, such as "SE", or
+    "GB-ENG" for subdivisions, rather than after their codepoints.
+    """
+    codes = [int(code, 16) for code in filename.split("_")]
+    if len(codes) == 2 and all(code in REGIONAL_INDICATORS for code in codes):
+        return "".join(chr(ord("A") + code - REGIONAL_INDICATORS[0]) for code in codes)
+    if len(codes) > 2 and codes[0] == WAVING_BLACK_FLAG and codes[-1] == CANCEL_TAG:
+        # Tags are ASCII characters moved to plane 14, and subdivision codes are lowercase.
+        tag = "".join(chr(code - 0xE0000) for code in codes[1:-1]).upper()
+        return f"{tag[:2]}-{tag[2:]}"
+    return None
+
+
+VENDOR_FILENAMES: dict[str, Callable[[str], str]] = {
+    "twemoji": twemoji_filename,
+    "noto": noto_filename,
+}
+
+
+def _is_flag(emoji: str) -> bool:
+    """Returns whether `emoji` is a country flag (a regional indicator pair) or a subdivision flag (a tag sequence)."""
+    codes = [ord(char) for char in emoji]
+    if len(codes) == 2 and all(code in REGIONAL_INDICATORS for code in codes):
+        return True
+    return codes[0] == WAVING_BLACK_FLAG and codes[-1] == CANCEL_TAG
+
+
+# Groups of emojis, by the structure of their sequences.
+EMOJI_CATEGORIES: dict[str, Callable[[str], bool]] = {
+    "flags": _is_flag,
+    "keycaps": lambda emoji: emoji.endswith(KEYCAP),
+}
+
+
+def normalize_name(name: str) -> str:
+    """Returns the form emoji names and aliases are indexed by, such as "thumbs_up" for ":thumbs_up:"."""
+    return name.strip().strip(":").lower().replace(" ", "_")
+
+
+class EmojiEntry(NamedTuple):
+    """An emoji in the emoji index."""
+
+    emoji: str  # The fully qualified emoji, such as "❤️".
+    codepoint: str  # The codepoint of `emoji`, such as "2764-fe0f".
+    name: str  # The CLDR short name, such as ":red_heart:".
+    aliases: tuple[str, ...]  # Other names of the emoji, such as ":heart:".
+
+    @property
+    def title(self) -> str:
+        """The name of the emoji, formatted for display."""
+        return alias_to_name(self.name)
+
+    def filename(self, vendor: str) -> str:
+        """Returns the name `vendor` uses for the source files of the emoji."""
+        return VENDOR_FILENAMES[vendor](self.codepoint)
+
+
+class EmojiIndex:
+    """
+    Lookup tables of every emoji, by character, codepoint and name.
+
+    Every variant of an emoji (such as "❤" without the variation selector)
+    resolves to the same entry. The names are also kept in a sorted list,
+    so that they can be searched by prefix with a binary search.
+    """
+
+    def __init__(self, entries: Iterable[EmojiEntry], variants: dict[str, str]):
+        """`variants` maps alternative forms of emojis to the fully qualified emojis of `entries`."""
+        self.entries = list(entries)
+        self.variants = variants
+
+        self.by_emoji = {entry.emoji: entry for entry in self.entries}
+        for variant, emoji in variants.items():
+            self.by_emoji.setdefault(variant, self.by_emoji[emoji])
+        self.by_codepoint = {
+            "-".join(get_codepoint(char) for char in emoji): entry
+            for emoji, entry in self.by_emoji.items()
+        }
+
+        self.by_name: dict[str, EmojiEntry] = {}
+        for entry in self.entries:
+            for name in (entry.name, *entry.aliases):
+                self.by_name.setdefault(normalize_name(name), entry)
+        self.names = sorted(self.by_name)
+        # Every later word of every name, such as "up" for "thumbs_up", with the name it's in.
+        self.words = sorted(
+            ("_".join(words[i:]), name)
+            for name, words in ((name, name.split("_")) for name in self.names)
+            for i in range(1, len(words))
+        )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, emoji: str) -> EmojiEntry | None:
+        """Returns the entry of the emoji character(s) `emoji`, in any variant."""
+        return self.by_emoji.get(emoji)
+
+    def from_codepoint(self, codepoint: str) -> EmojiEntry | None:
+        """Returns the entry of `codepoint`, such as "1f44d", in any variant or vendor file name."""
+        return self.by_codepoint.get(codepoint.lower().replace("_", "-"))
+
+    def from_name(self, name: str) -> EmojiEntry | None:
+        """Returns the entry with the name or alias `name`, such as ":thumbs_up:" or "thumbs up"."""
+        return self.by_name.get(normalize_name(name))
+
+    def search(self, prefix: str, limit: int = 25) -> list[EmojiEntry]:
+        """
+        Returns up to `limit` distinct emojis with a name or alias containing a word starting with `prefix`.
+
+        Names starting with `prefix` come first, followed by names with a
+        later word starting with it. Both are binary searches over sorted
+        lists, so a search takes time proportional to `limit`, not to the
+        number of emojis.
+        """
+        prefix = normalize_name(prefix)
+        results: dict[str, EmojiEntry] = {}
+
+        start = bisect.bisect_left(self.names, prefix)
+        for name in itertools.islice(self.names, start, None):
+            if len(results) >= limit or not name.startswith(prefix):
+                break
+            entry = self.by_name[name]
+            results.setdefault(entry.emoji, entry)
+
+        start = bisect.bisect_left(self.words, (prefix,))
+        for word, name in itertools.islice(self.words, start, None):
+            if len(results) >= limit or not word.startswith(prefix):
+                break
+            entry = self.by_name[name]
+            results.setdefault(entry.emoji, entry)
+
+        return list(results.values())
+
+    def category(self, category: str) -> list[EmojiEntry]:
+        """Returns every emoji in `category` (see `EMOJI_CATEGORIES`), in index order."""
+        matches = EMOJI_CATEGORIES[category]
+        return [entry for entry in self.entries if matches(entry.emoji)]
+
+    @classmethod
+    def from_emoji_data(cls) -> "EmojiIndex":
+        """Builds the index from the data of the `emoji` package."""
+        from emoji.unicode_codes import EMOJI_DATA
+
+        # The most qualified form of every emoji is its canonical form.
+        by_name: dict[str, list[str]] = {}
+        for emoji, data in sorted(
+            EMOJI_DATA.items(), key=lambda item: item[1]["status"]
+        ):
+            by_name.setdefault(data["en"], []).append(emoji)
+
+        entries, variants = [], {}
+        for name, (emoji, *others) in by_name.items():
+            aliases = tuple(EMOJI_DATA[emoji].get("alias", ()))
+            codepoint = "-".join(get_codepoint(char) for char in emoji)
+            entries.append(EmojiEntry(emoji, codepoint, name, aliases))
+            variants |= dict.fromkeys(others, emoji)
+        return cls(entries, variants)
+
+    def save(self, path: Path) -> None:
+        """Saves the index to `path` in a compact JSON format."""
+        from importlib.metadata import version
+
+        rows = [[entry.emoji, entry.name, entry.aliases] for entry in self.entries]
+        path.write_text(
+            json.dumps(
+                {
+                    "version": version("emoji"),
+                    "emojis": rows,
+                    "variants": self.variants,
+                },
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ),
+            encoding="utf-8",
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "EmojiIndex":
+        """
+        Loads an index saved with `save`.
+
+        Raises `ValueError` if it was built from another version of the `emoji` package.
+        """
+        from importlib.metadata import version
+
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data["version"] != version("emoji"):
+            raise ValueError(f"The index was built for emoji {data['version']}.")
+
+        entries = (
+            EmojiEntry(
+                emoji,
+                "-".join(get_codepoint(char) for char in emoji),
+                name,
+                tuple(aliases),
+            )
+            for emoji, name, aliases in data["emojis"]
+        )
+        return cls(entries, data["variants"])
+
+
+@functools.cache
+def emoji_index() -> EmojiIndex:
+    """
+    Returns the emoji index, building it on first use.
+
+    If `EmojiData.index_file` is set, the index is loaded from there, and
+    saved there whenever it has to be built.
     """
-    if not codepoint:
-        return None
-    if code := CODE_REGEX.search(codepoint):
-        return code.group()
+    path = Path(EmojiData.index_file) if EmojiData.index_file else None
+    if path is not None and path.exists():
+        try:
+            index = EmojiIndex.load(path)
+            logger.debug(f"Loaded the emoji index from {path}.")
+            return index
+        except (OSError, ValueError, KeyError) as e:
+            logger.info(f"Rebuilding the emoji index, since it couldn't be loaded: {e}")
+
+    index = EmojiIndex.from_emoji_data()
+    logger.debug(f"Built the emoji index, with {len(index)} emojis.")
+    if path is not None:
+        try:
+            index.save(path)
+        except OSError as e:
+            logger.warning(f"Could not save the emoji index to {path}: {e}")
+    return index
 
 
-def get_emoji(codepoint: str) -> str:
+def _code_points(raw_emoji: str) -> list[int] | None:
     """
-    Returns the emoji corresponding to a given `codepoint`, or `""` if no emoji was found.
+    Returns the code points in `raw_emoji`, or `None` if it isn't an emoji or codepoints.
 
-    The return value is an emoji character, such as "🍂". The `codepoint`
-    argument can be of any format, since it will be trimmed automatically.
+    Inputs with any non-ASCII character are taken as emoji characters, and
+    anything else as hexadecimal codepoints, separated by spaces, commas,
+    dashes or underscores (as in vendor file names).
     """
-    if code := trim_code(codepoint):
-        return chr(int(code, 16))
-    return ""
+    raw_emoji = raw_emoji.strip()
+    if not raw_emoji.isascii():
+        return [ord(char) for char in raw_emoji]
+
+    codes = []
+    for token in CODE_SEPARATOR_REGEX.split(raw_emoji):
+        if not (match := HEX_CODE_REGEX.fullmatch(token)):
+            return None
+        if (code := int(match.group(1), 16)) > sys.maxunicode:
+            return None
+        codes.append(code)
+    return codes
 
 
+def _first_emoji(codes: list[int]) -> list[int]:
+    """
+    Returns the code points of the first emoji in `codes`, in one pass.
+
+    An emoji is a pair of regional indicators (a flag), or a base character
+    followed by any modifiers (variation selectors, skin tones, keycaps and
+    tags), optionally joined to more of those with zero width joiners.
+    """
+    if codes and codes[0] in REGIONAL_INDICATORS:
+        return (
+            codes[:2]
+            if len(codes) > 1 and codes[1] in REGIONAL_INDICATORS
+            else codes[:1]
+        )
+
+    end = 1
+    while end < len(codes):
+        if codes[end] in EMOJI_MODIFIERS:
+            end += 1
+        elif codes[end] == JOINER and end + 1 < len(codes):
+            end += 2  # The joiner, and the next base character.
+        else:
+            break
+    return codes[:end]
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
 def codepoint_from_input(raw_emoji: str) -> str:
     """
-    Returns the codepoint corresponding to the passed tuple, separated by "-".
+    Returns the codepoint of the first emoji in `raw_emoji`, separated by "-".
+
+    The input can be the emoji itself, its codepoints, or its name, such as
+    "thumbs up" or ":+1:". The codepoint of the fully qualified form of the
+    emoji is returned, with every variation selector it needs. Use
+    `EmojiEntry.filename` to get the name used in URLs for emoji source files.
 
-    The return format matches the format used in URLs for emoji source files.
+    Results are cached, since the same emojis are asked for over and over.
 
     Example usages:
-    >>> codepoint_from_input(("🐍",))
+    >>> codepoint_from_input("🐍")
     "1f40d"
-    >>> codepoint_from_input(("1f1f8", "1f1ea"))
+    >>> codepoint_from_input("1f1f8 1f1ea")
     "1f1f8-1f1ea"
-    >>> codepoint_from_input(("👨‍👧‍👦",))
+    >>> codepoint_from_input("👨‍👧‍👦")
     "1f468-200d-1f467-200d-1f466"
+    >>> codepoint_from_input("1f3f3 200d 1f308")
+    "1f3f3-fe0f-200d-1f308"
+    >>> codepoint_from_input(":snake:")
+    "1f40d"
     """
-    emoji_list: list[str] = [emoji.lower() for emoji in raw_emoji.split()]
-    if is_emoji(emoji_list[0]):
-        emojis = (get_codepoint(emoji) for emoji in emoji_list[0])
-        return "-".join(emojis)
+    index = emoji_index()
+    if entry := index.get(raw_emoji.strip()):
+        return entry.codepoint  # A single emoji, as it's usually given.
+
+    if codes := _code_points(raw_emoji):
+        emoji = "".join(map(chr, _first_emoji(codes)))
+        if entry := index.get(emoji):
+            return entry.codepoint
 
-    emoji = "".join(get_emoji(trim_code(code)) for code in emoji_list)  # type: ignore
-    if is_emoji(emoji):
-        return "-".join(get_codepoint(e) for e in emoji)
+    if entry := index.from_name(raw_emoji):
+        return entry.codepoint
 
     raise ValueError("No codepoint could be obtained from the given input")
+
+
+def emojis_from_input(raw_emojis: str) -> list[EmojiEntry]:
+    """
+    Returns every distinct emoji in `raw_emojis`, in order.
+
+    Emojis can be written one after another, or separated by spaces or
+    commas. Codepoints must be separated by dashes within an emoji, such as
+    "1f1f8-1f1ea", since spaces separate emojis. Raises `ValueError` with
+    the first part of the input that isn't an emoji.
+    """
+    index = emoji_index()
+    entries: dict[str, EmojiEntry] = {}
+
+    for token in re.split(r"[\s,]+", raw_emojis.strip()):
+        if not token:
+            continue
+        if token.isascii():
+            try:
+                entry = index.from_codepoint(codepoint_from_input(token))
+            except ValueError:
+                raise ValueError(f"{token} isn't an emoji.")
+            entries.setdefault(entry.emoji, entry)  # type: ignore
+            continue
+
+        codes = [ord(char) for char in token]
+        while codes:
+            emoji = _first_emoji(codes)
+            codes = codes[len(emoji) :]
+            if (entry := index.get("".join(map(chr, emoji)))) is None:
+                raise ValueError(f"{''.join(map(chr, emoji))} isn't an emoji.")
+            entries.setdefault(entry.emoji, entry)
+
+    return list(entries.values())
+
+
+def emoji_choices(user_input: str) -> dict[str, str]:
+    """
+    Returns autocomplete choices of emojis with names matching `user_input`.
+
+    The suggestions are shown by name, and fill in the emoji character itself.
+    """
+    return {
+        f"{entry.emoji} {entry.title}": entry.emoji
+        for entry in emoji_index().search(user_input, AUTOCOMPLETE_LIMIT)
+    }
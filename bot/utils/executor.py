@@ -1,20 +1,195 @@
 import asyncio
-from loguru import logger
-from concurrent.futures import ThreadPoolExecutor
+import functools
+import multiprocessing
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.connection import Connection
 from typing import Callable, TypeVar
 
+from bot.constants import Executors
+from loguru import logger
 
-
-_EXECUTOR = ThreadPoolExecutor(10)
+_EXECUTOR = ThreadPoolExecutor(Executors.threads)
+_PROCESS_EXECUTOR: ProcessPoolExecutor | None = None
+# Forking a process with a running event loop and threads isn't safe.
+_CONTEXT = multiprocessing.get_context("spawn")
+# Workers for untrusted jobs, which are replaced when reloaded modules need picking up.
+_ISOLATED_WORKERS: set["_IsolatedWorker"] = set()
+_IDLE_WORKERS: list["_IsolatedWorker"] = []
+_ISOLATED_SLOTS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_GENERATION = 0
 T = TypeVar("T")
 
 
+def cpu_bound(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Marks `func` as CPU-bound, so that `in_executor` runs it in a process pool.
+
+    Work that holds the GIL for long stretches (like rendering or encoding
+    large images) would otherwise compete with every other job for one core.
+    The function, its arguments and its return value must be picklable, so
+    pass images as bytes rather than as `Image` objects.
+    """
+    func.cpu_bound = True  # type: ignore
+    return func
+
+
+def _process_executor() -> ProcessPoolExecutor:
+    """Returns the process pool, starting it on first use."""
+    global _PROCESS_EXECUTOR
+
+    if _PROCESS_EXECUTOR is None:
+        _PROCESS_EXECUTOR = ProcessPoolExecutor(
+            Executors.processes, mp_context=_CONTEXT
+        )
+    return _PROCESS_EXECUTOR
+
+
+class _IsolatedWorker:
+    """A process running one untrusted job at a time, which is killed if a job takes too long."""
+
+    def __init__(self) -> None:
+        self.generation = _GENERATION
+        self.connection, child = _CONTEXT.Pipe()
+        self.process = _CONTEXT.Process(
+            target=_run_isolated_jobs, args=(child,), daemon=True
+        )
+        self.process.start()
+        child.close()
+        _ISOLATED_WORKERS.add(self)
+
+    def kill(self) -> None:
+        """Kills the process, stopping its job if it's running one."""
+        self.process.kill()
+        self.process.join()
+        _ISOLATED_WORKERS.discard(self)
+
+
+def _run_isolated_jobs(connection: Connection) -> None:
+    """Runs the jobs sent through `connection`, reporting when each one starts and its result."""
+    while True:
+        try:
+            func, args, kwargs = connection.recv()
+        except EOFError:
+            return
+        connection.send(None)
+        try:
+            result = (True, func(*args, **kwargs))
+        except Exception as e:
+            result = (False, e)
+        try:
+            connection.send(result)
+        except Exception as e:  # The result or the error can't be pickled.
+            connection.send((False, RuntimeError(repr(e))))
+
+
+def _isolated_slots() -> asyncio.Semaphore:
+    """Returns the semaphore limiting the isolated jobs running at once on the current loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _ISOLATED_SLOTS:
+        _ISOLATED_SLOTS[loop] = asyncio.Semaphore(Executors.isolated_processes)
+    return _ISOLATED_SLOTS[loop]
+
+
 async def in_executor(func: Callable[..., T], *args, **kwargs) -> T:
     """
     Runs the given synchronous function `func` in an executor.
     This is useful for running slow, blocking code within async
     functions, so that they don't block the bot.
+
+    Functions marked with `cpu_bound` are run in a process pool, and
+    everything else in a thread pool.
     """
+    if getattr(func, "cpu_bound", False):
+        return await in_process(func, *args, **kwargs)
+
     logger.debug(f"Running {func.__name__} in an executor.")
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(_EXECUTOR, func, *args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _EXECUTOR, functools.partial(func, *args, **kwargs)
+    )
+
+
+async def in_process(func: Callable[..., T], *args, **kwargs) -> T:
+    """Runs `func` in the process pool, even if it isn't marked as `cpu_bound`."""
+    logger.debug(f"Running {func.__name__} in a process pool.")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _process_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def in_isolated_process(
+    func: Callable[..., T], *args, timeout: float, **kwargs
+) -> T:
+    """
+    Runs `func` in a process of its own, which is killed if it takes longer than `timeout`.
+
+    This is meant for jobs on untrusted input, which might never finish.
+    The timeout starts once the job does, so time spent waiting for a free
+    process isn't counted. Raises `asyncio.TimeoutError` on timeout, and
+    `BrokenProcessPool` if the process dies.
+    """
+    logger.debug(f"Running {func.__name__} in an isolated process.")
+    loop = asyncio.get_running_loop()
+    async with _isolated_slots():
+        worker = _IDLE_WORKERS.pop() if _IDLE_WORKERS else _IsolatedWorker()
+        finished = False
+        try:
+            await loop.run_in_executor(
+                _EXECUTOR, worker.connection.send, (func, args, kwargs)
+            )
+            await loop.run_in_executor(_EXECUTOR, worker.connection.recv)
+            success, result = await asyncio.wait_for(
+                loop.run_in_executor(_EXECUTOR, worker.connection.recv), timeout
+            )
+            finished = True
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"{func.__name__} timed out after {timeout}s, killing its process."
+            )
+            raise
+        except (EOFError, OSError):
+            raise BrokenProcessPool(
+                f"The process running {func.__name__} died."
+            ) from None
+        finally:
+            if finished and worker.generation == _GENERATION:
+                _IDLE_WORKERS.append(worker)
+            else:
+                worker.kill()
+
+    if not success:
+        raise result
+    return result
+
+
+def shutdown() -> None:
+    """Shuts down the executors, without waiting for queued jobs."""
+    _EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    if _PROCESS_EXECUTOR is not None:
+        _PROCESS_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    for worker in list(_ISOLATED_WORKERS):
+        worker.kill()
+    _IDLE_WORKERS.clear()
+
+
+def restart_process_pools() -> None:
+    """
+    Replaces the process pool and the isolated workers with new ones, started on their next use.
+
+    Workers import the modules of the functions they run once, so this is
+    needed for them to pick up reloaded modules. Jobs already running still
+    finish, or time out, in their old processes.
+    """
+    global _PROCESS_EXECUTOR, _GENERATION
+
+    if _PROCESS_EXECUTOR is not None:
+        _PROCESS_EXECUTOR.shutdown(wait=False)
+    _PROCESS_EXECUTOR = None
+
+    _GENERATION += 1
+    for worker in _IDLE_WORKERS:
+        worker.kill()
+    _IDLE_WORKERS.clear()
@@ -1,9 +1,15 @@
+import ast
+import hashlib
 import importlib
-import inspect
+import importlib.util
 import pkgutil
-from typing import Iterator, NoReturn
+import sys
+from importlib.machinery import ModuleSpec
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
 
-from bot import exts
+import bot
+from bot import exts, utils
 from loguru import logger
 
 
@@ -12,27 +18,176 @@ def unqualify(name: str) -> str:
     return name.rsplit(".", maxsplit=1)[-1]
 
 
-def walk_extensions() -> Iterator[str]:
-    """Yield extension names from the bot.exts subpackage."""
+def _parse(spec: ModuleSpec) -> ast.Module:
+    """Parse the source of the module described by `spec`, without importing it."""
+    if spec.origin is None:
+        raise ImportError(name=spec.name)
+    with open(spec.origin, "rb") as f:
+        return ast.parse(f.read(), spec.origin)
+
+
+def _defines_setup(spec: ModuleSpec) -> bool:
+    """Return whether the module described by `spec` has a top-level `setup` function."""
+    for node in _parse(spec).body:
+        if isinstance(node, ast.FunctionDef) and node.name == "setup":
+            return True
+        if isinstance(node, ast.ImportFrom) and any(
+            (alias.asname or alias.name) == "setup" for alias in node.names
+        ):
+            return True
+    return False
+
 
-    def on_error(name: str) -> NoReturn:
-        raise ImportError(name=name)  # pragma: no cover
+def _walk_modules(path: Iterable[str], prefix: str) -> Iterator[pkgutil.ModuleInfo]:
+    """
+    Yield every module under `path` recursively, like `pkgutil.walk_packages`.
 
-    for module in pkgutil.walk_packages(
-        exts.__path__, f"{exts.__name__}.", onerror=on_error
-    ):
+    Unlike `pkgutil.walk_packages`, packages are found from their directories
+    rather than by importing them.
+    """
+    for module in pkgutil.iter_modules(path, prefix):
+        yield module
+        if module.ispkg:
+            subpath = f"{module.module_finder.path}/{unqualify(module.name)}"  # type: ignore
+            yield from _walk_modules([subpath], f"{module.name}.")
+
+
+def walk_extensions() -> Iterator[str]:
+    """Yield extension names from the bot.exts subpackage, without importing them."""
+    for module in _walk_modules(exts.__path__, f"{exts.__name__}."):
         if unqualify(module.name).startswith("_"):
             # Ignore module/package names starting with an underscore.
             continue
 
         if module.ispkg:
-            imported = importlib.import_module(module.name)
-            if not inspect.isfunction(getattr(imported, "setup", None)):
+            spec = module.module_finder.find_spec(module.name)  # type: ignore
+            if spec is None or not _defines_setup(spec):
                 # If it lacks a setup function, it's not an extension.
                 continue
 
         yield module.name
 
 
+def extension_imports(name: str) -> list[str]:
+    """
+    Return the modules imported at the top level of the extension `name`, without importing it.
+
+    Modules imported with `from x import y` are given as `x`, even if `y` is
+    a module too.
+    """
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(name=name)
+
+    package = (
+        name if spec.submodule_search_locations is not None else name.rpartition(".")[0]
+    )
+    modules = []
+    for node in _parse(spec).body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            relative = "." * node.level + (node.module or "")
+            modules.append(importlib.util.resolve_name(relative, package))
+    return modules
+
+
+def import_extension_dependencies(name: str) -> None:
+    """Import the modules the extension `name` depends on, but not the extension itself."""
+    for module in extension_imports(name):
+        importlib.import_module(module)
+
+
+def module_dependencies() -> dict[str, set[str]]:
+    """
+    Return every module of the bot, mapped to the modules of the bot it imports at the top level.
+
+    Like `walk_extensions`, it's done from the sources, without importing anything.
+    """
+    specs = {}
+    for package in (bot, utils):
+        for module in _walk_modules(package.__path__, f"{package.__name__}."):
+            specs[module.name] = module.module_finder.find_spec(module.name)  # type: ignore
+
+    dependencies = {}
+    for name, spec in specs.items():
+        package = (
+            name
+            if spec.submodule_search_locations is not None
+            else name.rpartition(".")[0]
+        )
+        imported = set()
+        for node in _parse(spec).body:
+            if isinstance(node, ast.Import):
+                imported.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                base = importlib.util.resolve_name(
+                    "." * node.level + (node.module or ""), package
+                )
+                # The imported names may be modules too, as in `from bot.utils import cache`.
+                imported.add(base)
+                imported.update(f"{base}.{alias.name}" for alias in node.names)
+        dependencies[name] = {module for module in imported if module in specs} - {name}
+    return dependencies
+
+
+class _Source(NamedTuple):
+    mtime: int
+    digest: str
+
+
+class SourceTracker:
+    """
+    Remembers the source files of modules as they were loaded, to tell which ones changed since.
+
+    Files whose modification time changed are hashed, so that saving a file
+    without changing it doesn't count as a change.
+    """
+
+    def __init__(self):
+        self._sources: dict[str, _Source] = {}
+
+    @staticmethod
+    def _path(name: str) -> Path | None:
+        file = getattr(sys.modules.get(name), "__file__", None)
+        return Path(file) if file else None
+
+    def record(self, name: str) -> None:
+        """Remember the current source of the loaded module `name`."""
+        if (path := self._path(name)) is None:
+            return
+        try:
+            self._sources[name] = _Source(
+                path.stat().st_mtime_ns, hashlib.sha1(path.read_bytes()).hexdigest()
+            )
+        except OSError:
+            self._sources.pop(name, None)
+
+    def changed(self, name: str) -> bool:
+        """
+        Return whether the source of the loaded module `name` changed since it was recorded.
+
+        Modules that weren't recorded yet are recorded now, as unchanged.
+        """
+        if name not in self._sources:
+            self.record(name)
+            return False
+        if (path := self._path(name)) is None:
+            return False
+
+        source = self._sources[name]
+        try:
+            if path.stat().st_mtime_ns == source.mtime:
+                return False
+            digest = hashlib.sha1(path.read_bytes()).hexdigest()
+        except OSError:
+            return False  # It was removed, so there's nothing to reload it from.
+
+        if digest == source.digest:
+            self._sources[name] = source._replace(mtime=path.stat().st_mtime_ns)
+            return False
+        return True
+
+
 logger.info("Updating extensions")
 EXTENSIONS = frozenset(walk_extensions())
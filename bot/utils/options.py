@@ -0,0 +1,9 @@
+from disnake.ext import commands
+
+from bot.constants import OUTPUT_IMAGE_FORMATS
+
+# Option enums of slash commands that several extensions share. They're built
+# once here, instead of on every import (and reload) of each extension.
+OutputFormats = commands.option_enum(OUTPUT_IMAGE_FORMATS)
+EmojiVendors = commands.option_enum({"Twemoji": "twemoji", "Noto": "noto"})
+EmojiCategories = commands.option_enum({"Flags": "flags", "Keycaps": "keycaps"})
@@ -0,0 +1,227 @@
+import functools
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+import yaml
+from bot.utils.images import REDUCING_GAP, add_background
+from loguru import logger
+from PIL import Image, ImageDraw
+
+TEMPLATES_DIRECTORY = Path("bot/assets/templates")
+PREVIEWS_FILE = TEMPLATES_DIRECTORY / "previews.yaml"
+
+# Shapes are drawn this many times larger, and then downsampled for smooth edges.
+SUPERSAMPLING = 4
+# How images are fitted to slots of another aspect ratio.
+FITS = ("crop", "stretch")
+
+
+class Slot(NamedTuple):
+    """A place on a surface where the previewed image is shown."""
+
+    position: tuple[int, int]
+    size: tuple[int, int]
+
+    @property
+    def box(self) -> tuple[int, int, int, int]:
+        """The region of the surface covered by the slot."""
+        x, y = self.position
+        return x, y, x + self.size[0], y + self.size[1]
+
+
+class Surface(NamedTuple):
+    """A surface images can be previewed on, as described in the previews file."""
+
+    name: str
+    slots: tuple[Slot, ...]
+    template: str | None = None
+    mask: str | None = None
+    canvas: tuple[int, int] | None = None
+    shape: str | None = None
+    fill_background: bool = False
+    fit: str = "crop"
+
+
+class PreviewConfig(NamedTuple):
+    """The surfaces from the previews file, and the background color of every mode."""
+
+    modes: dict[str, str]
+    surfaces: dict[str, Surface]
+
+
+class PreparedSurface(NamedTuple):
+    """A surface in one mode, prepared for compositing images onto it."""
+
+    template: Image.Image
+    mask: Image.Image
+    # The template with the masked areas cleared, as they are covered by the image.
+    base: Image.Image
+
+
+def _size(raw: int | list[int]) -> tuple[int, int]:
+    """Returns a size from the previews file, where a single number is a square."""
+    if isinstance(raw, int):
+        return raw, raw
+    width, height = raw
+    return width, height
+
+
+@functools.cache
+def load_previews() -> PreviewConfig:
+    """Loads the previews file once, and returns its surfaces and modes."""
+    logger.debug(f"Loading preview surfaces from {PREVIEWS_FILE}.")
+    with open(PREVIEWS_FILE) as f:
+        raw = yaml.safe_load(f)
+
+    modes = {mode: options["background"] for mode, options in raw["modes"].items()}
+    surfaces = {}
+    for key, options in raw["surfaces"].items():
+        slots = tuple(
+            Slot(tuple(slot["position"]), _size(slot["size"]))  # type: ignore
+            for slot in options["slots"]
+        )
+        canvas = options.get("canvas")
+        fit = options.get("fit", "crop")
+        if fit not in FITS:
+            raise ValueError(f"Unknown fit {fit!r} for the surface {key!r}.")
+        surfaces[key] = Surface(
+            name=options["name"],
+            slots=slots,
+            template=options.get("template"),
+            mask=options.get("mask"),
+            canvas=_size(canvas) if canvas is not None else None,
+            shape=options.get("shape"),
+            fill_background=options.get("fill_background", False),
+            fit=fit,
+        )
+
+    return PreviewConfig(modes, surfaces)
+
+
+@functools.cache
+def _shape_mask(shape: str | None, size: tuple[int, int]) -> Image.Image:
+    """Returns a mask of `shape` filling a box of `size`, with anti-aliased edges."""
+    if shape is None:
+        return Image.new("L", size, 255)
+    if shape != "circle":
+        raise ValueError(f"Unknown slot shape {shape!r}.")
+
+    large = Image.new("L", (size[0] * SUPERSAMPLING, size[1] * SUPERSAMPLING), 0)
+    ImageDraw.Draw(large).ellipse((0, 0, large.width - 1, large.height - 1), fill=255)
+    return large.resize(size, Image.LANCZOS)
+
+
+@functools.cache
+def prepare_surface(key: str, mode: str) -> PreparedSurface:
+    """
+    Loads the template and mask of the surface `key` in `mode` once.
+
+    Surfaces without template images are drawn as a plain canvas in the
+    background color of the mode, masked by the shape of their slots.
+    """
+    config = load_previews()
+    surface = config.surfaces[key]
+
+    if surface.template is not None:
+        with Image.open(
+            TEMPLATES_DIRECTORY / surface.template.format(mode=mode)
+        ) as template:
+            template = template.convert("RGBA")
+        with Image.open(TEMPLATES_DIRECTORY / surface.mask) as mask:  # type: ignore
+            mask = mask.convert("L")
+    else:
+        template = Image.new("RGBA", surface.canvas, config.modes[mode])  # type: ignore
+        mask = Image.new("L", surface.canvas, 0)  # type: ignore
+        for slot in surface.slots:
+            mask.paste(_shape_mask(surface.shape, slot.size), slot.box)
+
+    base = Image.composite(Image.new("RGBA", template.size), template, mask)
+    return PreparedSurface(template, mask, base)
+
+
+def fit_box(
+    size: tuple[int, int], target: tuple[int, int]
+) -> tuple[int, int, int, int]:
+    """Returns the centered region of an image of `size`, with the aspect ratio of `target`."""
+    width, height = size
+    if width * target[1] > height * target[0]:
+        cropped = height * target[0] / target[1]
+        return (width - cropped) / 2, 0, (width + cropped) / 2, height  # type: ignore
+    cropped = width * target[1] / target[0]
+    return 0, (height - cropped) / 2, width, (height + cropped) / 2  # type: ignore
+
+
+def required_size(keys: Iterable[str]) -> tuple[int, int]:
+    """Returns the smallest size an image needs to fill every slot of the given surfaces."""
+    surfaces = load_previews().surfaces
+    sizes = [slot.size for key in keys for slot in surfaces[key].slots]
+    return max(width for width, _ in sizes), max(height for _, height in sizes)
+
+
+def render_previews(
+    image: Image.Image, keys: Iterable[str], modes: Iterable[str]
+) -> dict[tuple[str, str], Image.Image]:
+    """
+    Renders `image` on every surface in `keys`, in every mode in `modes`.
+
+    The image is reduced once for all slots, then resized once per distinct
+    slot size and fit, and filled with the background of a mode once per size, no
+    matter how many slots and surfaces share it. Only the regions covered by slots are composited, on
+    top of copies of the prepared surfaces.
+    This is blocking, so run it in an executor.
+    """
+    config = load_previews()
+    keys, modes = list(keys), list(modes)
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
+
+    # Reduces the image once for every slot, instead of in each resize.
+    width, height = required_size(keys)
+    factor = int(
+        min(
+            image.width / (width * REDUCING_GAP), image.height / (height * REDUCING_GAP)
+        )
+    )
+    if factor > 1:
+        image = image.reduce(factor)
+
+    variants: dict[tuple[tuple[int, int], str], Image.Image] = {}
+    filled: dict[tuple[tuple[int, int], str, str], Image.Image] = {}
+    previews = {}
+
+    for key in keys:
+        surface = config.surfaces[key]
+        for mode in modes:
+            template, mask, base = prepare_surface(key, mode)
+            preview = base.copy()
+
+            for slot in surface.slots:
+                if (variant := variants.get((slot.size, surface.fit))) is None:
+                    variant = image.resize(
+                        slot.size,
+                        box=(
+                            fit_box(image.size, slot.size)
+                            if surface.fit == "crop"
+                            else None
+                        ),
+                        reducing_gap=REDUCING_GAP,
+                    )
+                    variants[slot.size, surface.fit] = variant
+
+                box = slot.box
+                if surface.fill_background:
+                    filled_key = slot.size, surface.fit, mode
+                    if (variant_filled := filled.get(filled_key)) is None:
+                        variant_filled = add_background(variant, config.modes[mode])
+                        filled[filled_key] = variant_filled
+                    region = variant_filled
+                else:
+                    region = Image.alpha_composite(template.crop(box), variant)
+
+                preview.paste(
+                    Image.composite(region, template.crop(box), mask.crop(box)), box
+                )
+
+            previews[key, mode] = preview
+
+    return previews
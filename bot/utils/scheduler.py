@@ -0,0 +1,121 @@
+import asyncio
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator
+
+from disnake import Interaction
+from disnake.ext import commands
+from loguru import logger
+
+
+class SchedulerBusy(commands.CommandError):
+    """Raised when a job can't be admitted, since the bot or the user is at capacity."""
+
+
+class JobScheduler:
+    """
+    Admission control for slow jobs, such as image processing commands.
+
+    At most `max_running` jobs run at once. Jobs waiting for a slot are
+    queued per guild, and the guilds take turns, so one busy guild can't
+    starve the others. A job is rejected straight away with `SchedulerBusy`
+    if `max_queued` jobs are already waiting, or if its user or guild already
+    has `max_per_user` or `max_per_guild` jobs running or waiting.
+    """
+
+    def __init__(
+        self, max_running: int, max_queued: int, max_per_user: int, max_per_guild: int
+    ):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.max_per_user = max_per_user
+        self.max_per_guild = max_per_guild
+
+        self.running = 0
+        self._user_jobs: Counter[int] = Counter()
+        self._guild_jobs: Counter[int | None] = Counter()
+        self._queues: OrderedDict[int | None, deque[asyncio.Future]] = OrderedDict()
+
+    @property
+    def queued(self) -> int:
+        """The number of jobs waiting for a slot."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    @asynccontextmanager
+    async def job(self, inter: Interaction) -> AsyncIterator[None]:
+        """
+        Context manager holding a job slot for the duration of the block.
+
+        Raises `SchedulerBusy` before waiting, so that the user gets an answer
+        right away instead of the interaction timing out. Once admitted, the
+        interaction is deferred, since the job may have to wait for a slot.
+        """
+        user_id, guild_id = inter.author.id, inter.guild_id
+        if self._user_jobs[user_id] >= self.max_per_user:
+            raise SchedulerBusy(
+                "You already have a few jobs running. Please wait for them to finish."
+            )
+        if self._guild_jobs[guild_id] >= self.max_per_guild or (
+            self.running >= self.max_running and self.queued >= self.max_queued
+        ):
+            logger.debug(f"Rejected a job from {user_id} in {guild_id}, at capacity.")
+            raise SchedulerBusy("The bot is busy right now. Please try again soon.")
+
+        self._user_jobs[user_id] += 1
+        self._guild_jobs[guild_id] += 1
+        try:
+            await inter.response.defer()
+            await self._acquire(guild_id)
+            try:
+                yield
+            finally:
+                self._release()
+        finally:
+            self._finish(self._user_jobs, user_id)
+            self._finish(self._guild_jobs, guild_id)
+
+    @staticmethod
+    def _finish(jobs: Counter, key: int | None) -> None:
+        """Counts a job of `key` as done, forgetting `key` once it has none left."""
+        jobs[key] -= 1
+        if jobs[key] <= 0:
+            del jobs[key]
+
+    async def _acquire(self, guild_id: int | None) -> None:
+        if self.running < self.max_running and not self._queues:
+            self.running += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(guild_id, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # The slot was handed over just before cancelling.
+            else:
+                self._remove_waiter(guild_id, waiter)
+            raise
+
+    def _release(self) -> None:
+        """Frees a slot, and hands it to the next guild in turn, if any job is waiting."""
+        self.running -= 1
+
+        while self._queues and self.running < self.max_running:
+            guild_id, queue = self._queues.popitem(last=False)
+            waiter = queue.popleft()
+            if queue:
+                self._queues[guild_id] = queue  # Back of the line for this guild.
+
+            if not waiter.done():
+                self.running += 1
+                waiter.set_result(None)
+
+    def _remove_waiter(self, guild_id: int | None, waiter: asyncio.Future) -> None:
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            return
+        with suppress(ValueError):
+            queue.remove(waiter)
+        if not queue:
+            del self._queues[guild_id]
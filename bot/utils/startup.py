@@ -0,0 +1,143 @@
+import json
+import time
+from typing import NamedTuple
+
+
+class ExtensionTiming(NamedTuple):
+    name: str
+    import_time: float  # Seconds importing the modules the extension depends on.
+    setup_time: float  # Seconds executing the extension itself, and its `setup`.
+
+    @property
+    def total(self) -> float:
+        """Seconds the extension took to load."""
+        return self.import_time + self.setup_time
+
+
+class StartupProfile:
+    """
+    Timings of the startup of the bot, from `started_at` until it's ready.
+
+    Moments are given in seconds since `started_at`, which should be a value
+    of `time.perf_counter`.
+    """
+
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+        self.extensions: list[ExtensionTiming] = []
+        self.extensions_loaded: float | None = None
+        self.ready: float | None = None
+        self.warmed_up: float | None = None
+
+    def elapsed(self) -> float:
+        """Seconds since the start."""
+        return time.perf_counter() - self.started_at
+
+    def add_extension(self, name: str, import_time: float, setup_time: float) -> None:
+        """Records how long the extension `name` took to load."""
+        self.extensions.append(ExtensionTiming(name, import_time, setup_time))
+
+    def mark_extensions_loaded(self) -> None:
+        """Records that every extension is loaded."""
+        self.extensions_loaded = self.elapsed()
+
+    def mark_ready(self) -> None:
+        """Records that the bot is ready, the first time only, since reconnecting makes it ready again."""
+        if self.ready is None:
+            self.ready = self.elapsed()
+
+    def mark_warmed_up(self) -> None:
+        """Records that the slow preparations the bot does ahead of commands are done."""
+        self.warmed_up = self.elapsed()
+
+    def report(self) -> str:
+        """A summary of the startup, with the slowest extensions first."""
+        lines = []
+        if self.ready is not None:
+            lines.append(f"Ready after {self.ready:.2f}s.")
+        if self.extensions_loaded is not None:
+            lines.append(f"Extensions loaded after {self.extensions_loaded:.2f}s.")
+        if self.warmed_up is not None:
+            lines.append(f"Warmed up after {self.warmed_up:.2f}s.")
+        for timing in sorted(self.extensions, key=lambda t: t.total, reverse=True):
+            lines.append(
+                f"  {timing.name}: {timing.import_time * 1000:.1f}ms importing, "
+                f"{timing.setup_time * 1000:.1f}ms setting up"
+            )
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        """The timings, in a JSON-serializable form."""
+        return {
+            "extensions_loaded": self.extensions_loaded,
+            "ready": self.ready,
+            "warmed_up": self.warmed_up,
+            "extensions": [timing._asdict() for timing in self.extensions],
+        }
+
+
+def _start_once() -> None:
+    """Starts the bot up to the point it would connect to Discord, and prints the profile as JSON."""
+    from bot.bot import Bot
+
+    bot = Bot()
+    bot.startup.mark_ready()
+    if bot.startup.warmed_up is None:
+        for func in bot.warm_ups.values():
+            func()
+        bot.startup.mark_warmed_up()
+    print(json.dumps(bot.startup.to_dict()))
+
+
+def benchmark(runs: int) -> StartupProfile:
+    """
+    Measures `runs` cold starts of the bot, each in a fresh interpreter, and returns the median timings.
+
+    The bot doesn't connect to Discord, so it's "ready" once it would start to,
+    which is the part of the startup the bot is in control of. The warm-ups
+    are run right after, to measure them too.
+    """
+    import statistics
+    import subprocess
+    import sys
+
+    profiles = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-m", "bot.utils.startup", "--once"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        profiles.append(json.loads(result.stdout.splitlines()[-1]))
+
+    median = StartupProfile(0)
+    median.extensions_loaded = statistics.median(
+        p["extensions_loaded"] for p in profiles
+    )
+    median.ready = statistics.median(p["ready"] for p in profiles)
+    median.warmed_up = statistics.median(p["warmed_up"] for p in profiles)
+    for name in sorted({t["name"] for p in profiles for t in p["extensions"]}):
+        timings = [t for p in profiles for t in p["extensions"] if t["name"] == name]
+        median.add_extension(
+            name,
+            statistics.median(t["import_time"] for t in timings),
+            statistics.median(t["setup_time"] for t in timings),
+        )
+
+    return median
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure the cold start of the bot.")
+    parser.add_argument("runs", type=int, nargs="?", default=5)
+    parser.add_argument("--once", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.once:
+        _start_once()
+    else:
+        print(f"Median of {args.runs} cold starts:")
+        print(benchmark(args.runs).report())
@@ -0,0 +1,36 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from bot.utils.cache import CachedDownload, DownloadCache
+
+
+def download(data: bytes) -> CachedDownload:
+    return CachedDownload(data, None, None, time.time())
+
+
+class DownloadCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    async def test_evicted_downloads_are_read_back(self):
+        cache = DownloadCache(10, Path(self.directory.name), 1024)
+        cache.put("a", download(b"a" * 10))
+        cache.put("b", download(b"b" * 10))
+        await asyncio.gather(*cache._spill_tasks)
+        self.assertEqual(cache.get("a").data, b"a" * 10)  # type: ignore
+
+    async def test_directory_is_trimmed(self):
+        cache = DownloadCache(10, Path(self.directory.name), 100)
+        for name in "abcdefghij":
+            cache.put(name, download(name.encode() * 10))
+        await asyncio.gather(*cache._spill_tasks)
+        size = sum(file.stat().st_size for file in Path(self.directory.name).iterdir())
+        self.assertLessEqual(size, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from contextlib import asynccontextmanager
+from pathlib import Path
+from unittest import mock
+
+
+from bot.utils import emoji_assets
+from bot.utils.emoji_assets import AssetUnavailable, EmojiAssetStore
+
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg" width="1" height="1"/>'
+
+
+class Content:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    async def iter_chunked(self, _: int):
+        yield self.body
+
+
+class Session:
+    """Serves `files` by URL, and 404 for anything else, counting the requests."""
+
+    def __init__(self, files: dict[str, bytes]):
+        self.files = files
+        self.requests = 0
+
+    @asynccontextmanager
+    async def get(self, url: str):
+        self.requests += 1
+        await asyncio.sleep(0.01)
+        body = self.files.get(url)
+        yield mock.Mock(
+            status=404 if body is None else 200,
+            content_length=None if body is None else len(body),
+            content=Content(body or b""),
+        )
+
+
+class EmojiAssetStoreTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = EmojiAssetStore(Path(self.directory.name))
+        self.session = Session(
+            {emoji_assets.ASSET_URLS["twemoji"]["svg"].format("1f40d"): SVG}
+        )
+        patcher = mock.patch.object(emoji_assets, "INDEX_SAVE_DELAY", 0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+
+    async def get(self, filename: str) -> bytes:
+        return await self.store.get("twemoji", filename, "svg", self.session)  # type: ignore
+
+    async def test_concurrent_gets_share_a_fetch(self):
+        results = await asyncio.gather(*(self.get("1f40d") for _ in range(5)))
+        self.assertEqual(results, [SVG] * 5)
+        self.assertEqual(self.session.requests, 1)
+        self.assertEqual(await self.get("1f40d"), SVG)
+        self.assertEqual(self.session.requests, 1)
+
+    async def test_locks_are_dropped(self):
+        await asyncio.gather(*(self.get("1f40d") for _ in range(5)))
+        with self.assertRaises(AssetUnavailable):
+            await self.get("0")
+        self.assertEqual(self.store._locks, {})
+        self.assertEqual(len(self.store._lock_users), 0)
+
+    async def test_index_is_saved_in_batches(self):
+        await self.get("1f40d")
+        with self.assertRaises(AssetUnavailable):
+            await self.get("0")
+        self.assertFalse(self.store.index_path.exists())
+
+        await asyncio.sleep(0.2)
+        self.assertEqual(
+            json.loads(self.store.index_path.read_text()),
+            {"twemoji/svg/1f40d.svg": True, "twemoji/svg/0.svg": False},
+        )
+
+    async def test_noto_flags_come_from_region_flags(self):
+        self.session.files[emoji_assets.NOTO_FLAG_URL.format("SE")] = SVG
+        data = await self.store.get("noto", "1f1f8_1f1ea", "svg", self.session)  # type: ignore
+        self.assertEqual(data, SVG)
+        self.assertTrue(self.store.has("noto", "1f1f8_1f1ea", "svg"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+import zipfile
+from types import SimpleNamespace
+
+from disnake.ext import commands
+
+from bot.exts.emojis.render_emoji import RenderEmoji
+from bot.utils.emoji_assets import AssetUnavailable
+from bot.utils.emojis import emoji_index
+
+
+class PackRenderer(RenderEmoji):
+    """Renders every emoji as `size` bytes, except those in `unavailable` or `failing`."""
+
+    def __init__(self, unavailable=(), failing=()):
+        super().__init__(SimpleNamespace())  # type: ignore
+        self.unavailable = set(unavailable)
+        self.failing = set(failing)
+
+    async def render(self, entry, vendor, size, format):
+        await asyncio.sleep(0)
+        if entry.emoji in self.unavailable:
+            raise AssetUnavailable()
+        if entry.emoji in self.failing:
+            raise asyncio.TimeoutError()
+        return bytes(size)
+
+
+def entries(*emojis: str):
+    return [emoji_index().get(emoji) for emoji in emojis]
+
+
+class BuildPackTests(unittest.IsolatedAsyncioTestCase):
+    async def test_skips_unavailable_emojis(self):
+        renderer = PackRenderer(unavailable=["🍂"])
+        archive, skipped = await renderer.build_pack(
+            entries("🐍", "🍂", "👍"), "twemoji", 16, "PNG", 1024**2
+        )
+        with archive, zipfile.ZipFile(archive) as zip_file:
+            self.assertEqual(sorted(zip_file.namelist()), ["1f40d.png", "1f44d.png"])
+        self.assertEqual([entry.emoji for entry in skipped], ["🍂"])
+
+    async def test_passes_on_other_errors(self):
+        renderer = PackRenderer(failing=["🍂"])
+        with self.assertRaises(asyncio.TimeoutError):
+            await renderer.build_pack(
+                entries("🐍", "🍂", "👍"), "twemoji", 16, "PNG", 1024**2
+            )
+
+    async def test_size_limit(self):
+        renderer = PackRenderer()
+        with self.assertRaisesRegex(commands.BadArgument, "larger than"):
+            await renderer.build_pack(
+                entries("🐍", "🍂", "👍"), "twemoji", 1000, "PNG", 2500
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+
+from bot.utils.emojis import (
+    AUTOCOMPLETE_LIMIT,
+    codepoint_from_input,
+    emoji_choices,
+    emoji_index,
+    emojis_from_input,
+    noto_region,
+)
+
+
+class EmojiSearchTests(unittest.TestCase):
+    def test_prefix(self):
+        results = emoji_index().search("snak")
+        self.assertEqual(results[0].emoji, "🐍")
+
+    def test_names_and_aliases(self):
+        for query in ("thumbs up", ":+1:", "THUMBS_UP"):
+            with self.subTest(query=query):
+                self.assertIn(
+                    "👍", [entry.emoji for entry in emoji_index().search(query)]
+                )
+
+    def test_later_words_come_after_prefixes(self):
+        names = [entry.name for entry in emoji_index().search("up", 100)]
+        thumbs_up = names.index(":thumbs_up:")
+        self.assertTrue(all(name.lower().startswith(":up") for name in names[:5]))
+        self.assertFalse(
+            any(name.lower().startswith(":up") for name in names[thumbs_up:])
+        )
+
+    def test_limit_and_distinct(self):
+        results = emoji_index().search("a", 10)
+        self.assertEqual(len(results), 10)
+        self.assertEqual(len({entry.emoji for entry in results}), 10)
+        self.assertEqual(emoji_index().search("no emoji is called this"), [])
+
+    def test_choices(self):
+        self.assertEqual(emoji_choices("snake"), {"🐍 Snake": "🐍"})
+        self.assertEqual(len(emoji_choices("")), AUTOCOMPLETE_LIMIT)
+
+
+class CodepointFromInputTests(unittest.TestCase):
+    def assertParses(self, cases: dict[str, str]):
+        for raw_emoji, codepoint in cases.items():
+            with self.subTest(raw_emoji=raw_emoji):
+                self.assertEqual(codepoint_from_input(raw_emoji), codepoint)
+
+    def test_zwj_sequences(self):
+        self.assertParses(
+            {
+                "👨‍👩‍👦": "1f468-200d-1f469-200d-1f466",
+                "👩🏽‍💻": "1f469-1f3fd-200d-1f4bb",
+                "1f468 200d 1f469 200d 1f466": "1f468-200d-1f469-200d-1f466",
+            }
+        )
+
+    def test_skin_tones(self):
+        self.assertParses({"👍🏽": "1f44d-1f3fd", "U+1F44D U+1F3FD": "1f44d-1f3fd"})
+
+    def test_flags(self):
+        self.assertParses(
+            {
+                "🇸🇪": "1f1f8-1f1ea",
+                "1f1f8_1f1ea": "1f1f8-1f1ea",
+                "🏴󠁧󠁢󠁥󠁮󠁧󠁿": "1f3f4-e0067-e0062-e0065-e006e-e0067-e007f",
+            }
+        )
+
+    def test_keycaps(self):
+        self.assertParses({"#️⃣": "23-fe0f-20e3", "23 20e3": "23-fe0f-20e3"})
+
+    def test_variation_selectors_are_restored(self):
+        self.assertParses(
+            {"❤": "2764-fe0f", "1f3f3 200d 1f308": "1f3f3-fe0f-200d-1f308"}
+        )
+
+    def test_first_emoji_only(self):
+        self.assertParses({"🇸🇪🐍": "1f1f8-1f1ea", "👍🏽👍": "1f44d-1f3fd"})
+
+    def test_names_and_notations(self):
+        self.assertParses(
+            {
+                ":snake:": "1f40d",
+                "snake": "1f40d",
+                "0x1F40D": "1f40d",
+                "\\U0001f40d": "1f40d",
+            }
+        )
+
+    def test_invalid(self):
+        for raw_emoji in ("", "hello there", "zz", "110000"):
+            with self.subTest(raw_emoji=raw_emoji):
+                with self.assertRaises(ValueError):
+                    codepoint_from_input(raw_emoji)
+
+
+class EmojisFromInputTests(unittest.TestCase):
+    def test_splits_sequences(self):
+        entries = emojis_from_input("🇸🇪🇳🇴 👍🏽👍,👨‍👩‍👦 1f1f8-1f1ea")
+        self.assertEqual(
+            [entry.emoji for entry in entries], ["🇸🇪", "🇳🇴", "👍🏽", "👍", "👨‍👩‍👦"]
+        )
+
+    def test_invalid(self):
+        with self.assertRaisesRegex(ValueError, "hello"):
+            emojis_from_input("🐍 hello")
+
+
+class NotoRegionTests(unittest.TestCase):
+    def test_flags(self):
+        self.assertEqual(noto_region("1f1f8_1f1ea"), "SE")
+        self.assertEqual(
+            noto_region("1f3f4_e0067_e0062_e0065_e006e_e0067_e007f"), "GB-ENG"
+        )
+
+    def test_other_emojis(self):
+        self.assertIsNone(noto_region("1f40d"))
+        self.assertIsNone(noto_region("1f44d_1f3fd"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import io
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from disnake.ext import commands
+from PIL import Image
+
+from bot.constants import Animations
+from bot.exts.conversions.convert import Convert
+from bot.utils.cache import RenderCache
+from bot.utils.images import (
+    convert_bytes,
+    encode_animation,
+    encode_image,
+    file_from_bytes,
+    open_image,
+)
+from tests.test_masks import random_image
+
+
+def animation() -> bytes:
+    """Returns a GIF with a red frame followed by a blue one."""
+    red, blue = Image.new("RGB", (16, 16), "red"), Image.new("RGB", (16, 16), "blue")
+    output = io.BytesIO()
+    red.save(output, "GIF", save_all=True, append_images=[blue])
+    return output.getvalue()
+
+
+class EncodingTests(unittest.IsolatedAsyncioTestCase):
+    async def test_same_format_passes_through(self):
+        for format in ("PNG", "WEBP", "GIF"):
+            with self.subTest(format=format):
+                data = encode_image(random_image(32), format)
+                self.assertIs(await convert_bytes(data, format.lower()), data)
+
+    async def test_converts_other_formats(self):
+        data = encode_image(random_image(32), "PNG")
+        output = await convert_bytes(data, "WEBP")
+        with Image.open(io.BytesIO(output)) as image:
+            self.assertEqual(image.format, "WEBP")
+            self.assertEqual(image.size, (32, 32))
+
+    def test_jpeg_drops_transparency(self):
+        with Image.open(io.BytesIO(encode_image(random_image(32), "JPEG"))) as image:
+            self.assertEqual(image.mode, "RGB")
+
+    def test_file_reads_back_the_data(self):
+        data = encode_image(random_image(32), "PNG")
+        file = file_from_bytes(data, "image", "PNG")
+        self.assertEqual(file.filename, "image.png")
+        self.assertEqual(file.fp.read(), data)
+
+    async def test_still_formats_get_the_first_frame(self):
+        cog = Convert(SimpleNamespace(render_cache=RenderCache(1024**2)))
+        outputs = await cog._convert_all(animation(), ["WEBP", "JPEG"])
+        with Image.open(io.BytesIO(outputs["JPEG"])) as image:
+            red, green, blue = image.getpixel((8, 8))
+            self.assertGreater(red, blue)
+
+    def test_large_animations_are_rejected(self):
+        with Image.open(io.BytesIO(animation())) as image:
+            with mock.patch.object(Animations, "max_pixels", 2 * 16 * 16 - 1):
+                with self.assertRaises(commands.BadArgument):
+                    encode_animation(image, "GIF")
+            self.assertTrue(encode_animation(image, "GIF"))
+
+    async def test_svgs_are_rendered_at_the_target_size(self):
+        svg = b'<svg xmlns="http://www.w3.org/2000/svg" width="32" height="16"/>'
+        render = mock.AsyncMock(return_value=encode_image(random_image(32), "PNG"))
+        with mock.patch("bot.utils.images.render_svg_isolated", render):
+            await open_image(svg, target_size=(512, 512))
+        render.assert_awaited_once_with(svg, 1, (1024, 512))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import asyncio
+import time
+import unittest
+
+from bot.constants import Executors
+from bot.utils import executor
+from bot.utils.executor import in_isolated_process
+
+
+class IsolatedProcessTests(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        executor.restart_process_pools()
+
+    async def test_returns_result(self):
+        self.assertEqual(await in_isolated_process(max, 1, 2, timeout=30), 2)
+
+    async def test_raises_error(self):
+        with self.assertRaises(ValueError):
+            await in_isolated_process(int, "a", timeout=30)
+
+    async def test_queued_jobs_dont_time_out(self):
+        # Each job waits for a worker and for it to start, which isn't timed.
+        jobs = [
+            in_isolated_process(time.sleep, 0.5, timeout=0.9)
+            for _ in range(Executors.isolated_processes * 2)
+        ]
+        await asyncio.gather(*jobs)
+
+    async def test_timeout_only_kills_its_job(self):
+        slow = asyncio.create_task(in_isolated_process(time.sleep, 30, timeout=0.5))
+        fast = asyncio.create_task(in_isolated_process(time.sleep, 1, timeout=30))
+        with self.assertRaises(asyncio.TimeoutError):
+            await slow
+        self.assertIsNone(await fast)
+
+    async def test_timeout_after_restart(self):
+        job = asyncio.create_task(in_isolated_process(time.sleep, 30, timeout=2))
+        await asyncio.sleep(1)  # Let the job start before restarting.
+        executor.restart_process_pools()
+        with self.assertRaises(asyncio.TimeoutError):
+            await job
+        self.assertEqual(executor._ISOLATED_WORKERS, set())
+
+    async def test_restart_replaces_idle_workers(self):
+        await in_isolated_process(max, 1, 2, timeout=30)
+        (worker,) = executor._IDLE_WORKERS
+        executor.restart_process_pools()
+        self.assertFalse(worker.process.is_alive())
+        self.assertEqual(await in_isolated_process(max, 1, 2, timeout=30), 2)
@@ -0,0 +1,53 @@
+import os
+import unittest
+
+from PIL import Image
+
+from bot.utils.images import add_background, image_to_mask
+
+
+def legacy_image_to_mask(image: Image.Image) -> Image.Image:
+    """`image_to_mask` as it was, walking the pixels in Python."""
+    data: list[int] = []
+    for item in image.convert("RGBA").getdata():
+        data.append(0 if item[3] == 0 else 256)
+
+    mask = Image.new("L", image.size)
+    mask.putdata(data)
+    return mask
+
+
+def random_image(size: int, mode: str = "RGBA") -> Image.Image:
+    """An image of random pixels, with about half of them fully transparent."""
+    image = Image.frombytes("RGBA", (size, size), os.urandom(size * size * 4))
+    alpha = image.getchannel("A").point(lambda a: 0 if a < 128 else a)
+    image.putalpha(alpha)
+    return image.convert(mode)
+
+
+class ImageToMaskTests(unittest.TestCase):
+    def test_identical_to_legacy(self):
+        for mode in ("RGBA", "LA", "RGB", "L", "P"):
+            with self.subTest(mode=mode):
+                image = random_image(64, mode)
+                self.assertEqual(
+                    image_to_mask(image).tobytes(),
+                    legacy_image_to_mask(image).tobytes(),
+                )
+
+    def test_palette_transparency(self):
+        image = random_image(64).convert("P")
+        image.info["transparency"] = 0
+        self.assertEqual(
+            image_to_mask(image).tobytes(), legacy_image_to_mask(image).tobytes()
+        )
+
+    def test_add_background_identical_to_legacy(self):
+        image = random_image(64)
+        canvas = Image.new("RGBA", image.size, color="#202225")
+        expected = Image.composite(image, canvas, legacy_image_to_mask(image))
+        self.assertEqual(add_background(image, "#202225").tobytes(), expected.tobytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from PIL import Image, ImageColor
+
+from bot.utils.previews import load_previews, render_previews
+from tests.test_masks import random_image
+
+
+class RenderPreviewsTests(unittest.TestCase):
+    def test_every_surface_and_mode(self):
+        config = load_previews()
+        previews = render_previews(random_image(64), config.surfaces, config.modes)
+        self.assertEqual(
+            set(previews),
+            {(key, mode) for key in config.surfaces for mode in config.modes},
+        )
+
+    def test_slots_show_the_image(self):
+        red = Image.new("RGBA", (1024, 1024), "red")
+        preview = render_previews(red, ["emoji"], ["Dark"])["emoji", "Dark"]
+        for slot in load_previews().surfaces["emoji"].slots:
+            x, y = slot.position
+            center = x + slot.size[0] // 2, y + slot.size[1] // 2
+            self.assertEqual(preview.getpixel(center), (255, 0, 0, 255))
+
+    def test_server_icon_fills_background(self):
+        config = load_previews()
+        clear = Image.new("RGBA", (48, 48), (0, 0, 0, 0))
+        for mode, background in config.modes.items():
+            preview = render_previews(clear, ["server_icon"], [mode])[
+                "server_icon", mode
+            ]
+            x, y = config.surfaces["server_icon"].slots[0].position
+            self.assertEqual(
+                preview.getpixel((x + 24, y + 24)), ImageColor.getrgb(background)
+            )
+
+    def test_fit(self):
+        # The left third is red, so cropping to the center leaves only blue.
+        image = Image.new("RGBA", (144, 48), "blue")
+        image.paste((255, 0, 0, 255), (0, 0, 48, 48))
+        config = load_previews()
+        for key, color in (
+            ("server_icon", (255, 0, 0, 255)),
+            ("emoji", (0, 0, 255, 255)),
+        ):
+            with self.subTest(key=key):
+                preview = render_previews(image, [key], ["Dark"])[key, "Dark"]
+                x, y = config.surfaces[key].slots[0].position
+                self.assertEqual(preview.getpixel((x + 4, y + 24)), color)
+
+
+if __name__ == "__main__":
+    unittest.main()
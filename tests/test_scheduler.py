@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from bot.utils.scheduler import JobScheduler, SchedulerBusy
+
+
+def interaction(user_id: int, guild_id: int | None) -> SimpleNamespace:
+    async def defer() -> None:
+        pass
+
+    return SimpleNamespace(
+        author=SimpleNamespace(id=user_id),
+        guild_id=guild_id,
+        response=SimpleNamespace(defer=defer),
+    )
+
+
+class JobSchedulerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_counters_are_forgotten(self):
+        scheduler = JobScheduler(2, 10, 2, 10)
+        for user_id in range(100):
+            async with scheduler.job(interaction(user_id, user_id % 3)):
+                pass
+        self.assertEqual(len(scheduler._user_jobs), 0)
+        self.assertEqual(len(scheduler._guild_jobs), 0)
+
+    async def test_per_user_limit(self):
+        scheduler = JobScheduler(2, 10, 1, 10)
+        async with scheduler.job(interaction(1, 1)):
+            with self.assertRaises(SchedulerBusy):
+                async with scheduler.job(interaction(1, 1)):
+                    pass
+        self.assertEqual(len(scheduler._user_jobs), 0)
+
+    async def test_guilds_take_turns(self):
+        scheduler = JobScheduler(1, 10, 5, 5)
+        order = []
+        release = asyncio.Event()
+
+        async def run(user_id: int, guild_id: int) -> None:
+            async with scheduler.job(interaction(user_id, guild_id)):
+                order.append(guild_id)
+                await release.wait()
+
+        tasks = [asyncio.create_task(run(1, 1))]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(run(i, 1)) for i in (2, 3)]
+        tasks.append(asyncio.create_task(run(4, 2)))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, [1, 1, 2, 1])
+        self.assertEqual(scheduler.running, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from bot.utils.images import SNIFF_SIZE, sniff_format
+
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg" width="1" height="1"/>'
+
+
+class SniffFormatTests(unittest.TestCase):
+    def test_magic_numbers(self):
+        self.assertEqual(sniff_format(b"\x89PNG\r\n\x1a\n" + bytes(8)), "PNG")
+        self.assertEqual(sniff_format(b"RIFF\0\0\0\0WEBPVP8 "), "WEBP")
+        self.assertIsNone(sniff_format(b"not an image"))
+
+    def test_svg(self):
+        self.assertEqual(sniff_format(SVG), "SVG")
+        self.assertEqual(sniff_format(b"\xef\xbb\xbf\n" + SVG), "SVG")
+
+    def test_svg_after_long_prolog(self):
+        prolog = (
+            b'<?xml version="1.0" encoding="UTF-8"?>\n'
+            b"<!-- " + b"x" * (SNIFF_SIZE * 4) + b" -->\n"
+            b'<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN" '
+            b'"http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">\n'
+        )
+        self.assertEqual(sniff_format(prolog + SVG), "SVG")
+
+    def test_other_xml(self):
+        comment = b"<!-- " + b"x" * (SNIFF_SIZE * 4) + b" -->"
+        self.assertIsNone(sniff_format(comment + b"<html></html>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from bot.utils import options
+from bot.utils.startup import StartupProfile
+
+
+class StartupProfileTests(unittest.TestCase):
+    def test_report(self):
+        profile = StartupProfile(0)
+        profile.add_extension("fast", 0.001, 0.001)
+        profile.add_extension("slow", 0.2, 0.1)
+        profile.ready = 1.0
+        lines = profile.report().splitlines()
+        self.assertEqual(lines[0], "Ready after 1.00s.")
+        self.assertIn("slow: 200.0ms importing, 100.0ms setting up", lines[1])
+        self.assertIn("fast", lines[2])
+
+    def test_ready_once(self):
+        profile = StartupProfile(0)
+        profile.mark_ready()
+        ready = profile.ready
+        profile.mark_ready()  # Reconnecting.
+        self.assertEqual(profile.ready, ready)
+
+    def test_to_dict(self):
+        profile = StartupProfile(0)
+        profile.add_extension("ext", 0.1, 0.2)
+        self.assertEqual(
+            profile.to_dict()["extensions"],
+            [{"name": "ext", "import_time": 0.1, "setup_time": 0.2}],
+        )
+
+
+class OptionsTests(unittest.TestCase):
+    def test_shared_by_extensions(self):
+        from bot.exts.conversions import convert, rasterize
+
+        self.assertIs(convert.OutputFormats, options.OutputFormats)
+        self.assertIs(rasterize.OutputFormats, options.OutputFormats)
+
+
+if __name__ == "__main__":
+    unittest.main()